@@ -0,0 +1,13 @@
+"""Нагрузочные замеры страниц yatube.
+
+Запуск из каталога с manage.py::
+
+    python -m benchmarks seed --users 10000 --posts 100000
+    python -m benchmarks run --requests 200 --output before.json
+    python -m benchmarks compare before.json after.json
+    python -m benchmarks serialize --posts 500
+    python -m benchmarks startup --workers 4
+
+Замеры идут на отдельной базе (benchmarks.settings, YATUBE_BENCH_DB),
+рабочая база не затрагивается.
+"""
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import sys
+
+
+def main(argv=None):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description='Замеры страниц yatube.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='Заполнить базу замеров.')
+    seed.add_argument('--users', type=int, default=10000)
+    seed.add_argument('--posts', type=int, default=100000)
+    seed.add_argument('--groups', type=int, default=50)
+    seed.add_argument('--comments', type=int, default=200000)
+    seed.add_argument('--follows-per-user', type=int, default=20)
+    seed.add_argument('--seed', type=int, default=0)
+    seed.add_argument('--flush', action='store_true',
+                      help='Очистить базу замеров перед заполнением.')
+
+    run = commands.add_parser('run', help='Прогнать сценарии.')
+    run.add_argument('--requests', type=int, default=200,
+                     help='Запросов на маршрут.')
+    run.add_argument('--warmup', type=int, default=10)
+    run.add_argument('--route', action='append', dest='routes',
+                     help='Имя маршрута вида posts:index, можно несколько.')
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    concurrency = commands.add_parser(
+        'concurrency', help='Чтение под конкурентной записью.')
+    concurrency.add_argument('--readers', type=int, default=4)
+    concurrency.add_argument('--writers', type=int, default=2)
+    concurrency.add_argument('--duration', type=float, default=10.0,
+                             help='Секунд на профиль.')
+    concurrency.add_argument('--profile', action='append', dest='profiles',
+                             choices=('default', 'tuned'),
+                             help='Профиль соединений, можно несколько.')
+    concurrency.add_argument('--seed', type=int, default=0)
+    concurrency.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    serialize = commands.add_parser(
+        'serialize', help='Вывод поста: HTML против JSON.')
+    serialize.add_argument('--posts', type=int, default=500)
+    serialize.add_argument('--repeat', type=int, default=3)
+    serialize.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    startup = commands.add_parser(
+        'startup', help='Импорт по приложениям, загрузка и память воркеров.')
+    startup.add_argument('--workers', type=int, default=4)
+    startup.add_argument('--mode', action='append', dest='modes',
+                         choices=('cold', 'preload'),
+                         help='Режим загрузки воркеров, можно несколько.')
+    startup.add_argument('--path', default='/',
+                         help='Адрес первого запроса воркера.')
+    startup.add_argument('--limit', type=int, default=15,
+                         help='Сколько приложений показать по импорту.')
+    startup.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    compare = commands.add_parser('compare', help='Сравнить два отчёта.')
+    compare.add_argument('before')
+    compare.add_argument('after')
+
+    options = parser.parse_args(argv)
+    if options.command == 'compare':
+        from .report import compare as compare_reports
+        reports = []
+        for path in (options.before, options.after):
+            with open(path, encoding='utf-8') as report:
+                reports.append(json.load(report))
+        print('\n'.join(compare_reports(*reports)))
+        return 0
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    if options.command == 'seed':
+        from posts.models import Post
+        from .seed import seed as seed_database
+        if options.flush:
+            call_command('flush', interactive=False, verbosity=0)
+        elif Post.objects.exists():
+            parser.error('база замеров уже заполнена, добавьте --flush')
+        sizes = seed_database(
+            users=options.users, posts=options.posts, groups=options.groups,
+            comments=options.comments,
+            follows_per_user=options.follows_per_user, seed=options.seed,
+            stdout=sys.stdout)
+        print(json.dumps(sizes, ensure_ascii=False))
+        return 0
+
+    from .report import dump
+    if options.command == 'concurrency':
+        from . import concurrency as concurrent_benchmark
+        from .runner import git_revision
+        report = {'git': git_revision()}
+        report.update(concurrent_benchmark.run(
+            readers=options.readers, writers=options.writers,
+            duration=options.duration, profiles=options.profiles,
+            seed=options.seed))
+        print(dump(report, options.output))
+        return 0
+
+    if options.command == 'startup':
+        from . import startup as startup_benchmark
+        from .runner import git_revision
+        report = {'git': git_revision()}
+        report.update(startup_benchmark.run(
+            workers=options.workers,
+            modes=options.modes or startup_benchmark.MODES,
+            path=options.path, limit=options.limit))
+        print(dump(report, options.output))
+        return 0
+
+    if options.command == 'serialize':
+        from . import serialization
+        report = serialization.run(posts=options.posts,
+                                   repeat=options.repeat)
+        print(dump(report, options.output))
+        return 0
+
+    from .runner import run as run_benchmarks
+    report = run_benchmarks(requests=options.requests,
+                            warmup=options.warmup, routes=options.routes,
+                            seed=options.seed)
+    print(dump(report, options.output))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Чтение страниц под конкурентной записью комментариев.
+
+Один и тот же набор потоков прогоняется для каждого профиля соединений
+SQLite: 'default' - режимы Django и SQLite по умолчанию, 'tuned' -
+SQLITE_PRAGMAS и CONN_MAX_AGE из настроек проекта.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from . import scenarios
+from .runner import summarize
+
+PROFILES = {
+    'default': {
+        'pragmas': {
+            'journal_mode': 'delete',
+            'synchronous': 'full',
+            'mmap_size': 0,
+            'cache_size': -2000,
+        },
+        'conn_max_age': 0,
+    },
+    'tuned': {
+        'pragmas': None,
+        'conn_max_age': None,
+    },
+}
+
+READ_SCENARIOS = ('posts:index', 'posts:post_detail', 'posts:profile')
+WRITE_SCENARIO = 'posts:add_comment'
+
+
+class Worker(threading.Thread):
+    """Поток, повторяющий сценарии до истечения времени."""
+
+    def __init__(self, names, ctx, deadline, user=None):
+        super().__init__(daemon=True)
+        self.names = names
+        self.ctx = ctx
+        self.deadline = deadline
+        self.user = user
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        client = Client()
+        if self.user is not None:
+            client.force_login(self.user)
+        try:
+            while time.perf_counter() < self.deadline:
+                name = self.ctx.rng.choice(self.names)
+                method, address, data = scenarios.SCENARIOS[name](self.ctx)
+                start = time.perf_counter()
+                try:
+                    response = getattr(client, method)(address, data or {})
+                except Exception:
+                    self.errors += 1
+                    continue
+                self.latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    self.errors += 1
+        finally:
+            connections.close_all()
+
+
+def _summary(workers, duration):
+    latencies = [value for worker in workers for value in worker.latencies]
+    summary = summarize(latencies, [], sum(w.errors for w in workers),
+                        duration)
+    del summary['queries_mean'], summary['queries_max']
+    return summary
+
+
+def run_profile(profile, ctx, readers, writers, duration):
+    pragmas = profile['pragmas']
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    conn_max_age = profile['conn_max_age']
+    if conn_max_age is None:
+        conn_max_age = settings.DATABASES['default'].get('CONN_MAX_AGE', 0)
+    database = connections['default'].settings_dict
+    saved_max_age = database.get('CONN_MAX_AGE', 0)
+    connections.close_all()
+    database['CONN_MAX_AGE'] = conn_max_age
+    try:
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            deadline = time.perf_counter() + duration
+            read_workers = [Worker(READ_SCENARIOS, ctx, deadline)
+                            for _ in range(readers)]
+            write_workers = [Worker((WRITE_SCENARIO,), ctx, deadline,
+                                    user=ctx.reader)
+                             for _ in range(writers)]
+            for worker in read_workers + write_workers:
+                worker.start()
+            for worker in read_workers + write_workers:
+                worker.join()
+            connections.close_all()
+    finally:
+        database['CONN_MAX_AGE'] = saved_max_age
+    return {
+        'pragmas': pragmas,
+        'conn_max_age': conn_max_age,
+        'reads': _summary(read_workers, duration),
+        'writes': _summary(write_workers, duration),
+    }
+
+
+def run(readers=4, writers=2, duration=10.0, profiles=None, seed=0):
+    """Замер для каждого профиля; возвращает словарь для JSON-отчёта."""
+    ctx = scenarios.Context(seed)
+    return {
+        'params': {'readers': readers, 'writers': writers,
+                   'duration': duration, 'seed': seed},
+        'profiles': {
+            name: run_profile(PROFILES[name], ctx, readers, writers, duration)
+            for name in profiles or PROFILES
+        },
+    }
@@ -0,0 +1,34 @@
+"""Сохранение и сравнение JSON-отчётов без настройки Django."""
+import json
+
+
+def compare(before, after):
+    """Строки сравнения двух отчётов по p50, p95 и числу запросов."""
+    def change(old, new):
+        if not old:
+            return '   n/a'
+        return f'{(new - old) / old * 100:+6.1f}%'
+
+    lines = [f"{before['git']['commit'] or '-'} -> "
+             f"{after['git']['commit'] or '-'}",
+             f"{'route':<24}{'p50 ms':>18}{'p95 ms':>18}{'queries':>16}"]
+    for name, new in after['routes'].items():
+        old = before['routes'].get(name)
+        if old is None:
+            lines.append(f'{name:<24} новый маршрут')
+            continue
+        lines.append(
+            f"{name:<24}"
+            f"{new['p50_ms']:>10.2f} {change(old['p50_ms'], new['p50_ms'])}"
+            f"{new['p95_ms']:>10.2f} {change(old['p95_ms'], new['p95_ms'])}"
+            f"{new['queries_mean']:>8.1f} "
+            f"{change(old['queries_mean'], new['queries_mean'])}")
+    return lines
+
+
+def dump(report, path=None):
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    return text
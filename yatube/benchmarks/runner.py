@@ -0,0 +1,110 @@
+import math
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.test import Client
+
+from core.middleware import QueryCounter
+
+from . import scenarios
+from .seed import dataset
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, rank):
+    """Значение по методу ближайшего ранга для отсортированного списка."""
+    if not values:
+        return 0.0
+    index = max(math.ceil(rank / 100 * len(values)) - 1, 0)
+    return values[index]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'mean_ms': round(sum(latencies) / len(latencies), 3)
+        if latencies else 0,
+        'queries_mean': round(sum(queries) / len(queries), 2)
+        if queries else 0,
+        'queries_max': max(queries, default=0),
+    }
+    for rank in PERCENTILES:
+        summary[f'p{rank}_ms'] = round(percentile(latencies, rank), 3)
+    return summary
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(
+            ('git',) + args, cwd=settings.BASE_DIR, capture_output=True,
+            text=True).stdout.strip()
+    changes = git('status', '--porcelain', '--untracked-files=no')
+    return {'commit': git('rev-parse', 'HEAD') or None,
+            'dirty': bool(changes)}
+
+
+def run_route(client, scenario, ctx, requests, warmup):
+    latencies, queries, errors = [], [], 0
+    for number in range(warmup + requests):
+        method, address, data = scenario(ctx)
+        with QueryCounter() as counter:
+            start = time.perf_counter()
+            response = getattr(client, method)(address, data or {})
+            latency = (time.perf_counter() - start) * 1000
+        if number < warmup:
+            continue
+        latencies.append(latency)
+        queries.append(counter.count)
+        if response.status_code >= 400:
+            errors += 1
+    return latencies, queries, errors
+
+
+def run(requests=200, warmup=10, routes=None, seed=0):
+    """Прогоняет сценарии и возвращает отчёт для сохранения в JSON."""
+    scenarios.check_coverage()
+    ctx = scenarios.Context(seed)
+    anonymous = Client()
+    authorized = Client()
+    authorized.force_login(ctx.reader)
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'settings': {
+            'POSTS_PAGINATION': settings.POSTS_PAGINATION,
+            'FOLLOW_TIMELINE_ENABLED': settings.FOLLOW_TIMELINE_ENABLED,
+            'POSTS_SEARCH_BACKEND': settings.POSTS_SEARCH_BACKEND,
+            'CACHE_BACKEND': settings.CACHES['default']['BACKEND'],
+        },
+        'dataset': dataset(),
+        'params': {'requests': requests, 'warmup': warmup, 'seed': seed},
+        'routes': {},
+    }
+    all_latencies, all_queries, all_errors, total = [], [], 0, 0.0
+    for name in routes or scenarios.route_names():
+        scenario = scenarios.SCENARIOS[name]
+        client = authorized if scenario.authorized else anonymous
+        start = time.perf_counter()
+        latencies, queries, errors = run_route(
+            client, scenario, ctx, requests, warmup)
+        elapsed = sum(latencies) / 1000
+        total += elapsed
+        report['routes'][name] = summarize(
+            latencies, queries, errors, elapsed)
+        report['routes'][name]['wall_s'] = round(
+            time.perf_counter() - start, 3)
+        all_latencies += latencies
+        all_queries += queries
+        all_errors += errors
+    report['total'] = summarize(all_latencies, all_queries, all_errors, total)
+    return report
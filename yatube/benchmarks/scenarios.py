@@ -0,0 +1,188 @@
+"""Сценарии запросов для каждого маршрута posts/urls.py.
+
+Сценарий получает общий контекст и возвращает (метод, адрес, данные).
+Маршрут без сценария - ошибка: новый URL нельзя забыть в замерах.
+"""
+import random
+from collections import deque
+
+from django.urls import reverse
+
+from posts import urls as posts_urls
+from posts.models import Group, Post, User
+from posts.search import terms
+from posts.utils import encode_cursor
+
+SAMPLE_SIZE = 1000
+MAX_PAGE = 5
+
+SCENARIOS = {}
+
+
+def scenario(name, authorized=False):
+    def register(func):
+        func.authorized = authorized
+        SCENARIOS[f'{posts_urls.app_name}:{name}'] = func
+        return func
+    return register
+
+
+def route_names():
+    return [f'{posts_urls.app_name}:{pattern.name}'
+            for pattern in posts_urls.urlpatterns]
+
+
+class Context:
+    """Выборки из базы, из которых сценарии берут адреса."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.reader = (
+            User.objects.order_by('-counters__following_count', 'pk')
+            .first())
+        sample = list(
+            Post.objects.order_by('?').values_list('pk', 'pub_date')
+            [:SAMPLE_SIZE])
+        self.post_ids = [pk for pk, _ in sample]
+        self.cursors = [encode_cursor(pub_date, pk)
+                        for pk, pub_date in sample]
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.authors = list(
+            User.objects.order_by('-counters__posts_count', 'pk')
+            .values_list('username', flat=True)[:SAMPLE_SIZE])
+        self.own_post_ids = list(
+            Post.objects.filter(author=self.reader)
+            .values_list('pk', flat=True)[:SAMPLE_SIZE])
+        if not self.own_post_ids:
+            self.own_post_ids = [
+                Post.objects.create(author=self.reader, text='Замер').pk]
+        words = set()
+        for text in Post.objects.values_list('text', flat=True)[:200]:
+            words.update(term for term in terms(text) if len(term) > 3)
+        self.words = sorted(words) or ['пост']
+        self.followed = deque()
+
+    def cursor(self):
+        """?after= со случайного поста или первая страница."""
+        if self.rng.randint(1, MAX_PAGE) == 1:
+            return ''
+        return '?after=' + self.rng.choice(self.cursors)
+
+    def page(self):
+        number = self.rng.randint(1, MAX_PAGE)
+        return f'?page={number}' if number > 1 else ''
+
+    def popular_author(self):
+        # Чем выше автор в списке, тем чаще открывают его профиль.
+        index = int(self.rng.paretovariate(1.2)) - 1
+        return self.authors[min(index, len(self.authors) - 1)]
+
+
+@scenario('index')
+def index(ctx):
+    return 'get', reverse('posts:index') + ctx.page(), None
+
+
+@scenario('group_list')
+def group_list(ctx):
+    slug = ctx.rng.choice(ctx.slugs)
+    return 'get', reverse('posts:group_list', args=(slug,)) + ctx.page(), None
+
+
+@scenario('profile')
+def profile(ctx):
+    return 'get', reverse(
+        'posts:profile', args=(ctx.popular_author(),)) + ctx.page(), None
+
+
+@scenario('post_detail')
+def post_detail(ctx):
+    return 'get', reverse(
+        'posts:post_detail', args=(ctx.rng.choice(ctx.post_ids),)), None
+
+
+@scenario('post_comments')
+def post_comments(ctx):
+    return 'get', reverse(
+        'posts:post_comments', args=(ctx.rng.choice(ctx.post_ids),)), None
+
+
+@scenario('post_create', authorized=True)
+def post_create(ctx):
+    return 'get', reverse('posts:post_create'), None
+
+
+@scenario('post_edit', authorized=True)
+def post_edit(ctx):
+    return 'get', reverse(
+        'posts:post_edit', args=(ctx.rng.choice(ctx.own_post_ids),)), None
+
+
+@scenario('add_comment', authorized=True)
+def add_comment(ctx):
+    return 'post', reverse(
+        'posts:add_comment', args=(ctx.rng.choice(ctx.post_ids),)), {
+            'text': ' '.join(ctx.rng.sample(ctx.words, 3)
+                             if len(ctx.words) >= 3 else ctx.words)}
+
+
+@scenario('search')
+def search(ctx):
+    return 'get', reverse('posts:search'), {'q': ctx.rng.choice(ctx.words)}
+
+
+@scenario('follow_index', authorized=True)
+def follow_index(ctx):
+    return 'get', reverse('posts:follow_index') + ctx.page(), None
+
+
+@scenario('follow_bulk', authorized=True)
+def follow_bulk(ctx):
+    usernames = ctx.rng.sample(ctx.authors, min(20, len(ctx.authors)))
+    action = ctx.rng.choice(('follow', 'unfollow'))
+    return 'post', reverse('posts:follow_bulk'), {
+        'usernames': ' '.join(usernames), 'action': action}
+
+
+@scenario('profile_follow', authorized=True)
+def profile_follow(ctx):
+    username = ctx.rng.choice(ctx.authors)
+    ctx.followed.append(username)
+    return 'get', reverse('posts:profile_follow', args=(username,)), None
+
+
+@scenario('profile_unfollow', authorized=True)
+def profile_unfollow(ctx):
+    username = (ctx.followed.popleft() if ctx.followed
+                else ctx.rng.choice(ctx.authors))
+    return 'get', reverse('posts:profile_unfollow', args=(username,)), None
+
+
+@scenario('api_index')
+def api_index(ctx):
+    return 'get', reverse('posts:api_index') + ctx.cursor(), None
+
+
+@scenario('api_group_list')
+def api_group_list(ctx):
+    slug = ctx.rng.choice(ctx.slugs)
+    return 'get', reverse(
+        'posts:api_group_list', args=(slug,)) + ctx.cursor(), None
+
+
+@scenario('api_profile')
+def api_profile(ctx):
+    return 'get', reverse(
+        'posts:api_profile', args=(ctx.popular_author(),)) + ctx.cursor(), None
+
+
+@scenario('api_follow_index', authorized=True)
+def api_follow_index(ctx):
+    return 'get', reverse('posts:api_follow_index') + ctx.cursor(), None
+
+
+def check_coverage():
+    missing = set(route_names()) - set(SCENARIOS)
+    if missing:
+        raise LookupError(
+            'Нет сценария для маршрутов: ' + ', '.join(sorted(missing)))
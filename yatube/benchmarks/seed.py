@@ -0,0 +1,131 @@
+"""Заполнение базы замеров правдоподобными данными.
+
+Авторство постов, популярность постов и подписки распределены по
+степенному закону: немногие авторы пишут и собирают подписчиков больше
+всех, а у большинства пользователей подписок единицы.
+"""
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts import counters
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import explicit_dates
+
+BATCH_SIZE = 500
+TEXTS_POOL = 2000
+PASSWORD = 'bench-password'
+
+
+def zipf_weights(size, exponent=1.1):
+    """Накопленные веса рангов 1..size для random.choices."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def _bulk(model, objects):
+    for start in range(0, len(objects), BATCH_SIZE):
+        model.objects.bulk_create(
+            objects[start:start + BATCH_SIZE], ignore_conflicts=True)
+
+
+def seed(users=10000, posts=100000, groups=50, comments=200000,
+         follows_per_user=20, days=365, seed=0, stdout=None):
+    """Создаёт набор данных и возвращает его размеры."""
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    now = timezone.now()
+
+    def log(message):
+        if stdout:
+            stdout.write(message + '\n')
+
+    password = make_password(PASSWORD)
+    texts = [fake.paragraph(nb_sentences=rng.randint(1, 8))
+             for _ in range(TEXTS_POOL)]
+
+    with transaction.atomic():
+        log(f'Пользователи: {users}')
+        _bulk(User, [
+            User(username=f'{fake.user_name()}_{i}',
+                 first_name=fake.first_name(),
+                 last_name=fake.last_name(),
+                 password=password)
+            for i in range(users)])
+        user_ids = list(User.objects.order_by('pk').values_list(
+            'pk', flat=True))
+        # Ранг пользователя в списке определяет его популярность.
+        rng.shuffle(user_ids)
+        user_weights = zipf_weights(len(user_ids))
+
+        log(f'Группы: {groups}')
+        _bulk(Group, [
+            Group(title=fake.catch_phrase()[:200], slug=f'group-{i}',
+                  description=fake.paragraph())
+            for i in range(groups)])
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+
+        log(f'Посты: {posts}')
+        authors = rng.choices(user_ids, cum_weights=user_weights, k=posts)
+        post_field = Post._meta.get_field('pub_date')
+        with explicit_dates(post_field):
+            _bulk(Post, [
+                Post(author_id=author_id,
+                     group_id=(rng.choice(group_ids)
+                               if group_ids and rng.random() < 0.7
+                               else None),
+                     text=rng.choice(texts),
+                     pub_date=now - timedelta(
+                         seconds=rng.randint(0, days * 86400)))
+                for author_id in authors])
+        post_ids = list(Post.objects.order_by('-pub_date').values_list(
+            'pk', flat=True))
+
+        log(f'Комментарии: {comments}')
+        comment_field = Comment._meta.get_field('created')
+        targets = rng.choices(
+            post_ids, cum_weights=zipf_weights(len(post_ids), 0.8),
+            k=comments) if post_ids else []
+        with explicit_dates(comment_field):
+            _bulk(Comment, [
+                Comment(post_id=post_id,
+                        author_id=rng.choice(user_ids),
+                        text=rng.choice(texts)[:300],
+                        created=now - timedelta(
+                            seconds=rng.randint(0, days * 86400)))
+                for post_id in targets])
+
+        log('Подписки')
+        follows = []
+        for user_id in user_ids:
+            wanted = min(int(rng.paretovariate(1.2) * follows_per_user / 6),
+                         len(user_ids) - 1)
+            authors = set(rng.choices(
+                user_ids, cum_weights=user_weights, k=wanted))
+            authors.discard(user_id)
+            follows.extend(Follow(user_id=user_id, author_id=author_id)
+                           for author_id in authors)
+        _bulk(Follow, follows)
+
+        log('Счётчики')
+        counters.recount()
+    call_command('rebuild_search_index', stdout=stdout)
+    return dataset()
+
+
+def dataset():
+    """Размеры набора данных в текущей базе."""
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
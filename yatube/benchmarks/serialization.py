@@ -0,0 +1,53 @@
+"""Стоимость вывода одного поста: карточка HTML против JSON API.
+
+Для одних и тех же постов отдельно замеряются выборка из базы (модели
+с select_related для HTML, values для JSON) и вывод каждого поста.
+"""
+import time
+
+from django.template.loader import get_template
+
+from posts import api
+from posts.models import Post
+from posts.templatetags.post_tags import CARD_TEMPLATE
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def _best(func, repeat):
+    return min(_timed(func)[1] for _ in range(repeat))
+
+
+def run(posts=500, repeat=3):
+    """Лучшее из repeat время на пост в микросекундах."""
+    fields = list(api.FIELDS)
+    lookups = list({*api.CURSOR_FIELDS, *(api.FIELDS[f] for f in fields)})
+    models = Post.objects.select_related('author', 'group')[:posts]
+    rows = Post.objects.values(*lookups)[:posts]
+    instances, html_fetch = _timed(lambda: list(models))
+    values, json_fetch = _timed(lambda: list(rows))
+    count = len(instances)
+    if not count:
+        return {'posts': 0}
+    template = get_template(CARD_TEMPLATE)
+    converters = api.field_converters(fields)
+    html = _best(lambda: [template.render({'post': post})
+                          for post in instances], repeat)
+    json = _best(lambda: [api.serialize(row, converters)
+                          for row in values], repeat)
+
+    def per_post(seconds):
+        return round(seconds / count * 1000000, 2)
+
+    return {
+        'posts': count,
+        'html_fetch_us': per_post(html_fetch),
+        'json_fetch_us': per_post(json_fetch),
+        'html_render_us': per_post(html),
+        'json_serialize_us': per_post(json),
+        'speedup': round((html_fetch + html) / (json_fetch + json), 2),
+    }
@@ -0,0 +1,18 @@
+import os
+
+from yatube.settings import *  # noqa: F401,F403
+from yatube.settings import BASE_DIR
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'YATUBE_BENCH_DB', os.path.join(BASE_DIR, 'bench.sqlite3')),
+    }
+}
+
+# Превью генерируются синхронно, чтобы фоновый пул не искажал замеры.
+POST_THUMBNAILS_ASYNC = False
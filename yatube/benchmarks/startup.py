@@ -0,0 +1,236 @@
+"""Запуск воркеров: время импорта по приложениям, загрузка и память.
+
+Импорт yatube.wsgi замеряется в отдельном интерпретаторе с
+-X importtime, время модулей суммируется по приложениям. Пул воркеров
+повторяет gunicorn: в режиме preload приложение загружается в мастере
+до fork (как preload_app в gunicorn.conf.py), в режиме cold - каждым
+воркером после fork. Воркер отвечает на один запрос; время загрузки
+считается от fork до ответа, память берётся из /proc/<pid>/smaps_rollup.
+
+Модуль запускается и как мастер пула (python -m benchmarks.startup),
+поэтому на верхнем уровне импортирует только стандартную библиотеку.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from wsgiref.util import setup_testing_defaults
+
+APPLICATION = 'yatube.wsgi'
+MODES = ('cold', 'preload')
+# Модули, которые не должны загружаться до первого запроса с картинкой.
+# sorl.thumbnail.fields, .shortcuts, .default и .conf грузятся всегда:
+# их импортирует сам пакет sorl.thumbnail из INSTALLED_APPS.
+DEFERRED = (
+    'PIL',
+    'sorl.thumbnail.admin',
+    'sorl.thumbnail.engines',
+    'sorl.thumbnail.images',
+    'sorl.thumbnail.kvstores',
+    'sorl.thumbnail.templatetags',
+)
+MEMORY_FIELDS = {
+    'Rss': 'rss', 'Pss': 'pss',
+    'Private_Clean': 'private', 'Private_Dirty': 'private',
+    'Shared_Clean': 'shared', 'Shared_Dirty': 'shared',
+}
+
+
+def _base_dir():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _python(*args):
+    result = subprocess.run(
+        (sys.executable,) + args, cwd=_base_dir(), capture_output=True,
+        text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def package(name):
+    """Приложение модуля: пакет верхнего уровня или django.contrib.*."""
+    parts = name.split('.')
+    if parts[:2] == ['django', 'contrib'] and len(parts) > 2:
+        return '.'.join(parts[:3])
+    return parts[0]
+
+
+def parse_importtime(text):
+    """Время импорта каждого модуля в микросекундах из вывода -X importtime."""
+    modules = {}
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        if own.strip().isdigit():
+            modules[name.strip()] = int(own)
+    return modules
+
+
+def summarize(modules, limit=15):
+    """Собственное время модулей по приложениям, самые долгие первыми."""
+    packages = {}
+    for name, own in modules.items():
+        entry = packages.setdefault(package(name), {'modules': 0, 'us': 0})
+        entry['modules'] += 1
+        entry['us'] += own
+    ranked = sorted(packages.items(), key=lambda item: -item[1]['us'])
+    summary = {name: {'modules': entry['modules'],
+                      'ms': round(entry['us'] / 1000, 1)}
+               for name, entry in ranked[:limit]}
+    rest = ranked[limit:]
+    if rest:
+        summary['(прочие)'] = {
+            'modules': sum(entry['modules'] for _, entry in rest),
+            'ms': round(sum(entry['us'] for _, entry in rest) / 1000, 1)}
+    return summary
+
+
+def deferred_loaded(modules):
+    """Модули из DEFERRED (и их подмодули), загруженные при импорте."""
+    return sorted({
+        deferred for deferred in DEFERRED for name in modules
+        if name == deferred or name.startswith(deferred + '.')})
+
+
+def import_times(module=APPLICATION):
+    _, stderr = _python('-X', 'importtime', '-c', f'import {module}')
+    return parse_importtime(stderr)
+
+
+def memory(pid):
+    """Память процесса в МБ: rss, pss, private и shared."""
+    path = f'/proc/{pid}/smaps_rollup'
+    if not os.path.exists(path):
+        return {}
+    totals = dict.fromkeys(MEMORY_FIELDS.values(), 0)
+    with open(path) as source:
+        for line in source:
+            key, _, value = line.partition(':')
+            if key in MEMORY_FIELDS:
+                totals[MEMORY_FIELDS[key]] += int(value.split()[0])
+    return {f'{key}_mb': round(kilobytes / 1024, 1)
+            for key, kilobytes in totals.items()}
+
+
+def load():
+    __import__(APPLICATION)
+    return sys.modules[APPLICATION].application
+
+
+def request(application, path):
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    status = []
+    body = application(
+        environ, lambda code, headers: status.append(int(code[:3])))
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return status[0]
+
+
+def _serve(application, started, path, results, release):
+    """Тело воркера: загрузка, один запрос, ожидание замера памяти."""
+    try:
+        if application is None:
+            application = load()
+        status = request(application, path)
+        report = {'boot_ms': (time.perf_counter() - started) * 1000,
+                  'status': status}
+    except Exception as error:
+        report = {'error': repr(error)}
+    try:
+        os.write(results, (json.dumps(report) + '\n').encode())
+        # Воркер живёт, пока мастер не снимет память со всех воркеров.
+        os.read(release, 1)
+    finally:
+        os._exit(0)
+
+
+def pool(mode, workers, path):
+    """Мастер пула: поднимает воркеров и возвращает их замеры."""
+    application, master_ms = None, None
+    if mode == 'preload':
+        start = time.perf_counter()
+        application = load()
+        from core.warmup import before_fork
+        before_fork()
+        master_ms = (time.perf_counter() - start) * 1000
+    release_read, release_write = os.pipe()
+    children = []
+    for _ in range(workers):
+        results_read, results_write = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(results_read)
+            os.close(release_write)
+            _serve(application, started, path, results_write, release_read)
+        os.close(results_write)
+        children.append((pid, results_read))
+    reports = []
+    for pid, results_read in children:
+        with os.fdopen(results_read) as results:
+            report = json.loads(results.readline())
+        report.update(memory(pid))
+        reports.append(report)
+    os.close(release_write)
+    for pid, _ in children:
+        os.waitpid(pid, 0)
+    return {'master_load_ms': master_ms and round(master_ms, 1),
+            'workers': reports}
+
+
+def _aggregate(result):
+    workers = result['workers']
+    errors = [worker['error'] for worker in workers if 'error' in worker]
+    if errors:
+        return {'errors': errors}
+    boot = [worker['boot_ms'] for worker in workers]
+    summary = {
+        'master_load_ms': result['master_load_ms'],
+        'boot_p50_ms': round(statistics.median(boot), 1),
+        'boot_max_ms': round(max(boot), 1),
+        'statuses': sorted({worker['status'] for worker in workers}),
+    }
+    for key in ('rss_mb', 'pss_mb', 'private_mb', 'shared_mb'):
+        if key in workers[0]:
+            summary[f'worker_{key}'] = round(statistics.mean(
+                worker[key] for worker in workers), 1)
+    if 'pss_mb' in workers[0]:
+        summary['workers_pss_total_mb'] = round(
+            sum(worker['pss_mb'] for worker in workers), 1)
+    return summary
+
+
+def run(workers=4, modes=MODES, path='/', limit=15):
+    """Импорт по приложениям и загрузка пула воркеров в каждом режиме."""
+    modules = import_times()
+    report = {
+        'imports': {
+            'total_ms': round(sum(modules.values()) / 1000, 1),
+            'modules': len(modules),
+            'deferred_loaded': deferred_loaded(modules),
+            'packages': summarize(modules, limit),
+        },
+        'modes': {},
+    }
+    if not hasattr(os, 'fork'):
+        return report
+    for mode in modes:
+        stdout, _ = _python('-m', 'benchmarks.startup', mode,
+                            str(workers), path)
+        report['modes'][mode] = _aggregate(
+            json.loads(stdout.splitlines()[-1]))
+    return report
+
+
+if __name__ == '__main__':
+    mode, workers, path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    print(json.dumps(pool(mode, workers, path)))
@@ -1,5 +1,32 @@
-from django.apps import AppConfig
+from importlib import import_module
+
+from django.apps import AppConfig, apps
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import module_has_submodule
+
+# Приложения, чей модуль admin не импортируется при запуске:
+# sorl.thumbnail.admin содержит только миксины для форм и моделей не
+# регистрирует.
+ADMIN_AUTODISCOVER_SKIP = ('sorl.thumbnail',)
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db import apply_sqlite_pragmas
+        connection_created.connect(
+            apply_sqlite_pragmas, dispatch_uid='core.apply_sqlite_pragmas')
+
+
+class AdminConfig(SimpleAdminConfig):
+    """django.contrib.admin с autodiscover без ADMIN_AUTODISCOVER_SKIP."""
+
+    def ready(self):
+        super().ready()
+        for app_config in apps.get_app_configs():
+            if app_config.name in ADMIN_AUTODISCOVER_SKIP:
+                continue
+            if module_has_submodule(app_config.module, 'admin'):
+                import_module(f'{app_config.name}.admin')
@@ -0,0 +1,9 @@
+"""Общий кэш для нескольких процессов.
+
+RedisCache подключается как BACKEND 'core.cache.RedisCache' с LOCATION
+вида redis://host:port/db. Клиент протокола встроен (resp.py), для
+тестов есть сервер в памяти процесса (server.py).
+"""
+from .backend import RedisCache
+
+__all__ = ['RedisCache']
@@ -0,0 +1,373 @@
+import logging
+import os
+import pickle
+import threading
+import uuid
+from functools import wraps
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .local import LocalCache
+from .resp import Client, Connection, ConnectionError, RedisError, encode
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# INCRBY только для существующего ключа, атомарно на сервере.
+INCR_EXISTING = (
+    "if redis.call('EXISTS', KEYS[1]) == 1 then "
+    "return redis.call('INCRBY', KEYS[1], ARGV[1]) end "
+    "return false")
+
+
+def dumps(value):
+    # Целые числа хранятся как есть, чтобы работал INCRBY.
+    if type(value) is int:
+        return b'%d' % value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def loads(data):
+    if data is None:
+        return None
+    if data[:1] == b'\x80':
+        return pickle.loads(data)
+    return int(data)
+
+
+def degrade(fallback):
+    """Без связи с сервером операция ведёт себя как в DummyCache.
+
+    Кэш необязателен: недоступный Redis даёт промахи и потерянные
+    записи, а не ошибку страницы; add, как и там, считается удавшимся.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except ConnectionError as error:
+                logger.warning('Кэш недоступен (%s): %s',
+                               method.__name__, error)
+                return fallback
+        return wrapper
+    return decorator
+
+
+class Invalidator(threading.Thread):
+    """Слушает канал инвалидаций и убирает ключи из локального кэша.
+
+    Сообщение имеет вид "<процесс>|<ключ>", ключ "*" очищает весь
+    локальный кэш; свои сообщения пропускаются.
+    Если подписка оборвалась, сообщения могли потеряться, поэтому
+    локальный кэш очищается целиком.
+    """
+
+    def __init__(self, shared):
+        super().__init__(name='cache-invalidator', daemon=True)
+        self.shared = shared
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.conn = None
+
+    def on_message(self, payload):
+        origin, _, key = payload.decode().partition('|')
+        if origin == self.shared.origin:
+            return
+        if key == '*':
+            self.shared.local.clear()
+        else:
+            self.shared.local.delete(key)
+
+    def run(self):
+        shared = self.shared
+        delay = 0.1
+        while not self.stopped.is_set():
+            conn = self.conn = Connection(**shared.client.pool.params)
+            try:
+                # Сообщений может не быть долго, это не обрыв связи.
+                conn.set_read_timeout(None)
+                conn.send(encode('SUBSCRIBE', shared.channel))
+                conn.read()
+                self.ready.set()
+                delay = 0.1
+                while True:
+                    reply = conn.read()
+                    if isinstance(reply, list) and reply[0] == b'message':
+                        self.on_message(reply[2])
+            except ConnectionError:
+                if not self.stopped.is_set():
+                    logger.warning('Подписка на инвалидации кэша оборвалась')
+            finally:
+                conn.close()
+                shared.local.clear()
+            self.stopped.wait(delay)
+            delay = min(delay * 2, 5)
+
+    def stop(self):
+        self.stopped.set()
+        if self.conn is not None:
+            self.conn.close()
+
+
+class Shared:
+    """Пул соединений, L1 и подписка, общие для потоков одного процесса."""
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, url, channel, local_size, local_ttl, timeout,
+                 max_idle):
+        self.channel = channel
+        self.client = Client.from_url(
+            url, timeout=timeout, max_idle=max_idle)
+        self.local = LocalCache(local_size, local_ttl)
+        self.origin = uuid.uuid4().hex
+        self.invalidator = None
+        if local_size > 0:
+            self.invalidator = Invalidator(self)
+            self.invalidator.start()
+
+    def close(self):
+        if self.invalidator is not None:
+            self.invalidator.stop()
+        self.client.pool.disconnect()
+
+    @classmethod
+    def get(cls, config):
+        # После fork соединения и поток подписки родителя непригодны,
+        # поэтому у каждого процесса свой экземпляр.
+        key = (os.getpid(),) + config
+        shared = cls._instances.get(key)
+        if shared is None:
+            with cls._lock:
+                shared = cls._instances.get(key)
+                if shared is None:
+                    shared = cls._instances[key] = cls(*config)
+        return shared
+
+
+class RedisCache(BaseCache):
+    """Общий кэш на сервере Redis с локальным кэшем процесса перед ним.
+
+    Горячие ключи читаются из LocalCache и не ходят в сеть; там лежат
+    сериализованные значения, поэтому каждый вызов получает свою копию,
+    как у LocMem и самого Redis. Запись
+    сразу меняет локальный кэш и рассылает ключ в канал инвалидаций,
+    чтобы другие процессы убрали его у себя; время жизни локальных
+    записей дополнительно ограничено L1_TTL.
+
+    Django создаёт экземпляр кэша на каждый поток, а соединения, L1 и
+    подписка общие для всех потоков процесса (см. Shared). При обрыве
+    связи чтение отдаёт L1 или промах, а запись теряется (см. degrade).
+
+    OPTIONS: L1_SIZE, L1_TTL, CHANNEL, SOCKET_TIMEOUT, MAX_IDLE.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.local_size = options.get('L1_SIZE', 1000)
+        self.local_ttl = options.get('L1_TTL', 5.0)
+        self.channel = options.get('CHANNEL', 'yatube:cache:invalidate')
+        self.config = (
+            server, self.channel, self.local_size, self.local_ttl,
+            options.get('SOCKET_TIMEOUT', 1.0), options.get('MAX_IDLE', 16))
+        self._shared = None
+
+    def _ensure_process(self):
+        shared = Shared.get(self.config)
+        if shared is not self._shared:
+            self.attach(shared)
+
+    def attach(self, shared):
+        self._shared = shared
+        self.client = shared.client
+        self.local = shared.local
+        self.origin = shared.origin
+        self.invalidator = shared.invalidator
+
+    def _publish(self, pipeline, *keys):
+        if self.local_size > 0:
+            for key in keys:
+                pipeline.command(
+                    'PUBLISH', self.channel, f'{self.origin}|{key}')
+
+    def _ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return timeout
+
+    def _set_command(self, key, data, timeout, *flags):
+        command = ['SET', key, data]
+        if timeout is not None:
+            command += ['PX', max(int(timeout * 1000), 1)]
+        return command + list(flags)
+
+    @degrade(True)
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_process()
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._ttl(timeout)
+        if timeout is not None and timeout <= 0:
+            return False
+        data = dumps(value)
+        pipeline = self.client.pipeline()
+        pipeline.command(*self._set_command(key, data, timeout, 'NX'))
+        added = pipeline.execute()[0] == 'OK'
+        if added:
+            self.local.set(key, data, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        self._ensure_process()
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data = self.local.get(key, _MISSING)
+        if data is not _MISSING:
+            return loads(data)
+        try:
+            data = self.client.execute('GET', key)
+        except ConnectionError as error:
+            logger.warning('Кэш недоступен (get): %s', error)
+            return default
+        if data is None:
+            return default
+        self.local.set(key, data)
+        return loads(data)
+
+    def get_many(self, keys, version=None):
+        self._ensure_process()
+        found, missing = {}, {}
+        for key in keys:
+            full_key = self.make_key(key, version=version)
+            self.validate_key(full_key)
+            data = self.local.get(full_key, _MISSING)
+            if data is _MISSING:
+                missing[full_key] = key
+            else:
+                found[key] = loads(data)
+        if missing:
+            try:
+                values = self.client.execute('MGET', *missing)
+            except ConnectionError as error:
+                logger.warning('Кэш недоступен (get_many): %s', error)
+                return found
+            for full_key, data in zip(missing, values):
+                if data is not None:
+                    self.local.set(full_key, data)
+                    found[missing[full_key]] = loads(data)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    @degrade([])
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_process()
+        timeout = self._ttl(timeout)
+        keys = {}
+        for key, value in data.items():
+            full_key = self.make_key(key, version=version)
+            self.validate_key(full_key)
+            keys[full_key] = dumps(value)
+        if timeout is not None and timeout <= 0:
+            self._delete(list(keys))
+            return []
+        pipeline = self.client.pipeline()
+        for full_key, value in keys.items():
+            pipeline.command(*self._set_command(full_key, value, timeout))
+        self._publish(pipeline, *keys)
+        for reply in pipeline.execute():
+            if isinstance(reply, RedisError):
+                raise reply
+        for full_key, value in keys.items():
+            self.local.set(full_key, value, timeout)
+        return []
+
+    @degrade(False)
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_process()
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._ttl(timeout)
+        self.local.delete(key)
+        pipeline = self.client.pipeline()
+        if timeout is None:
+            pipeline.command('PERSIST', key)
+        else:
+            pipeline.command('PEXPIRE', key, max(int(timeout * 1000), 1))
+        pipeline.command('EXISTS', key)
+        self._publish(pipeline, key)
+        return bool(pipeline.execute()[1])
+
+    def _delete(self, keys):
+        for key in keys:
+            self.local.delete(key)
+        pipeline = self.client.pipeline()
+        pipeline.command('DEL', *keys)
+        self._publish(pipeline, *keys)
+        return pipeline.execute()[0]
+
+    @degrade(False)
+    def delete(self, key, version=None):
+        self._ensure_process()
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self._delete([key]))
+
+    @degrade(None)
+    def delete_many(self, keys, version=None):
+        self._ensure_process()
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        if keys:
+            self._delete(keys)
+
+    @degrade(False)
+    def has_key(self, key, version=None):
+        self._ensure_process()
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if self.local.get(key, _MISSING) is not _MISSING:
+            return True
+        return bool(self.client.execute('EXISTS', key))
+
+    def incr(self, key, delta=1, version=None):
+        self._ensure_process()
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        pipeline = self.client.pipeline()
+        pipeline.command('EVAL', INCR_EXISTING, 1, key, delta)
+        self._publish(pipeline, key)
+        try:
+            value = pipeline.execute()[0]
+        except ConnectionError as error:
+            logger.warning('Кэш недоступен (incr): %s', error)
+            value = None
+        if isinstance(value, RedisError):
+            raise ValueError(str(value))
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        self.local.set(key, b'%d' % value)
+        return value
+
+    def clear(self):
+        """Очищает всю базу Redis из LOCATION и локальный кэш."""
+        self._ensure_process()
+        self.local.clear()
+        self._flush()
+
+    @degrade(None)
+    def _flush(self):
+        pipeline = self.client.pipeline()
+        pipeline.command('FLUSHDB')
+        self._publish(pipeline, '*')
+        pipeline.execute()
+
+    def close(self, **kwargs):
+        # Соединения переиспользуются между запросами.
+        pass
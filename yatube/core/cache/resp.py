@@ -0,0 +1,234 @@
+"""Минимальный клиент протокола Redis (RESP2) без внешних зависимостей.
+
+Соединения берутся из пула и возвращаются в него после команды.
+Pipeline отправляет пачку команд одной записью в сокет и читает ответы
+подряд, поэтому N команд стоят одного сетевого обхода.
+"""
+import socket
+import threading
+from contextlib import contextmanager
+from urllib.parse import unquote, urlparse
+
+CRLF = b'\r\n'
+
+
+class RedisError(Exception):
+    """Ответ сервера с ошибкой (-ERR ...)."""
+
+
+class ConnectionError(RedisError):
+    """Сервер недоступен или оборвал соединение."""
+
+
+def encode(*args):
+    """Команда в виде массива bulk-строк RESP."""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = b'%d' % arg
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+def read_reply(stream):
+    """Читает один ответ RESP из файлового объекта сокета."""
+    line = stream.readline()
+    if not line.endswith(CRLF):
+        raise ConnectionError('Соединение закрыто сервером')
+    kind, body = line[:1], line[1:-2]
+    if kind == b'+':
+        return body.decode()
+    if kind == b'-':
+        return RedisError(body.decode())
+    if kind == b':':
+        return int(body)
+    if kind == b'$':
+        length = int(body)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError('Соединение закрыто сервером')
+        return data[:-2]
+    if kind == b'*':
+        length = int(body)
+        if length < 0:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise ConnectionError(f'Неизвестный ответ сервера: {line!r}')
+
+
+def _raise_error(reply):
+    if isinstance(reply, RedisError):
+        raise reply
+    return reply
+
+
+class Connection:
+    """Одно TCP-соединение с сервером."""
+
+    def __init__(self, host, port, db=0, password=None, timeout=None):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._stream = None
+
+    def connect(self):
+        try:
+            self._sock = socket.create_connection(
+                (self.host, self.port), self.timeout)
+        except OSError as error:
+            raise ConnectionError(str(error)) from error
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self._sock.makefile('rb')
+        if self.password:
+            self.execute('AUTH', self.password)
+        if self.db:
+            self.execute('SELECT', self.db)
+
+    def close(self):
+        sock, stream = self._sock, self._stream
+        self._sock = self._stream = None
+        if sock is not None:
+            # shutdown будит поток, который ждёт ответа на этом сокете.
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            stream.close()
+            sock.close()
+
+    def set_read_timeout(self, timeout):
+        """Таймаут ожидания ответа; None - ждать сколько угодно."""
+        if self._sock is None:
+            self.connect()
+        self._sock.settimeout(timeout)
+
+    def send(self, data):
+        if self._sock is None:
+            self.connect()
+        try:
+            self._sock.sendall(data)
+        except OSError as error:
+            self.close()
+            raise ConnectionError(str(error)) from error
+
+    def read(self):
+        try:
+            return read_reply(self._stream)
+        except (OSError, ValueError) as error:
+            self.close()
+            raise ConnectionError(str(error)) from error
+        except ConnectionError:
+            self.close()
+            raise
+
+    def execute(self, *args):
+        self.send(encode(*args))
+        return _raise_error(self.read())
+
+
+class ConnectionPool:
+    """Пул соединений: свободные берутся последними вернувшимися."""
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None,
+                 timeout=None, max_idle=16):
+        self.params = {'host': host, 'port': port, 'db': db,
+                       'password': password, 'timeout': timeout}
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """Пул по адресу вида redis://:password@host:port/db."""
+        parsed = urlparse(url)
+        db = parsed.path.lstrip('/')
+        return cls(
+            host=parsed.hostname or 'localhost',
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            **kwargs)
+
+    def new_connection(self):
+        return Connection(**self.params)
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self.new_connection()
+        try:
+            yield conn
+        except ConnectionError:
+            conn.close()
+            raise
+        except RedisError:
+            # Ответ с ошибкой прочитан целиком, соединение исправно.
+            self._release(conn)
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        self._release(conn)
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def disconnect(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class Pipeline:
+    """Накапливает команды и выполняет их одним обходом сети."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.commands = []
+
+    def command(self, *args):
+        self.commands.append(args)
+        return self
+
+    def execute(self):
+        """Ответы на все команды по порядку; ошибки возвращаются как есть."""
+        if not self.commands:
+            return []
+        data = b''.join(encode(*args) for args in self.commands)
+        with self.pool.connection() as conn:
+            conn.send(data)
+            replies = [conn.read() for _ in self.commands]
+        self.commands = []
+        return replies
+
+
+class Client:
+    """Выполняет команды на соединениях из пула."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        return cls(ConnectionPool.from_url(url, **kwargs))
+
+    def execute(self, *args):
+        with self.pool.connection() as conn:
+            return conn.execute(*args)
+
+    def pipeline(self):
+        return Pipeline(self.pool)
@@ -0,0 +1,225 @@
+"""Сервер протокола Redis в памяти процесса для тестов и разработки.
+
+Поддерживает только команды, которые нужны RedisCache. Считает
+принятые соединения и команды, чтобы тесты могли проверять, что
+чтение из локального кэша не ходит в сеть, а pipeline отправляет
+команды одним обходом.
+"""
+import socketserver
+import threading
+import time
+from collections import Counter
+
+from .backend import INCR_EXISTING
+from .resp import RedisError, encode, read_reply
+
+
+def _reply(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, RedisError):
+        return b'-%s\r\n' % str(value).encode()
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode()
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(map(_reply, value))
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class Handler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self.db = 0
+        self.write_lock = threading.Lock()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def handle(self):
+        while True:
+            try:
+                args = read_reply(self.rfile)
+            except (RedisError, OSError):
+                return
+            if not isinstance(args, list) or not args:
+                return
+            name = args[0].decode().upper()
+            with self.server.lock:
+                self.server.commands[name] += 1
+            if name == 'SUBSCRIBE':
+                self.subscribe(args[1:])
+                return
+            method = getattr(self.server, 'cmd_' + name.lower(), None)
+            if method is None:
+                reply = RedisError(f'ERR unknown command {name}')
+            else:
+                reply = method(self, *args[1:])
+            self.wfile.write(_reply(reply))
+
+    def subscribe(self, channels):
+        with self.server.lock:
+            for channel in channels:
+                self.server.subscribers.setdefault(channel, []).append(self)
+        try:
+            for number, channel in enumerate(channels, 1):
+                with self.write_lock:
+                    self.wfile.write(
+                        _reply([b'subscribe', channel, number]))
+            # Клиент больше ничего не шлёт, ждём закрытия соединения.
+            while self.rfile.read(1):
+                pass
+        finally:
+            with self.server.lock:
+                for channel in channels:
+                    self.server.subscribers[channel].remove(self)
+
+    def send_message(self, channel, message):
+        with self.write_lock:
+            self.wfile.write(encode('message', channel, message))
+
+
+class StandInServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Хранилище ключей с временем жизни и рассылкой PUBLISH/SUBSCRIBE."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        super().__init__(address, Handler)
+        self.lock = threading.Lock()
+        self.databases = {}
+        self.subscribers = {}
+        self.commands = Counter()
+        self.connections = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        """Запускает сервер в фоновом потоке и возвращает его адрес."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _data(self, handler):
+        return self.databases.setdefault(handler.db, {})
+
+    def _get(self, handler, key):
+        data = self._data(handler)
+        item = data.get(key)
+        if item is not None and item[1] is not None \
+                and item[1] <= time.monotonic():
+            del data[key]
+            item = None
+        return item
+
+    def cmd_ping(self, handler, *args):
+        return 'PONG'
+
+    def cmd_auth(self, handler, password):
+        return 'OK'
+
+    def cmd_select(self, handler, db):
+        handler.db = int(db)
+        return 'OK'
+
+    def cmd_get(self, handler, key):
+        with self.lock:
+            item = self._get(handler, key)
+        return None if item is None else item[0]
+
+    def cmd_mget(self, handler, *keys):
+        with self.lock:
+            items = [self._get(handler, key) for key in keys]
+        return [None if item is None else item[0] for item in items]
+
+    def cmd_set(self, handler, key, value, *options):
+        options = [option.upper() for option in options]
+        expires = None
+        for unit, scale in ((b'EX', 1), (b'PX', 1000)):
+            if unit in options:
+                ttl = int(options[options.index(unit) + 1]) / scale
+                expires = time.monotonic() + ttl
+        with self.lock:
+            if b'NX' in options and self._get(handler, key) is not None:
+                return None
+            self._data(handler)[key] = (value, expires)
+        return 'OK'
+
+    def cmd_del(self, handler, *keys):
+        with self.lock:
+            found = [self._get(handler, key) for key in keys]
+            for key, item in zip(keys, found):
+                if item is not None:
+                    del self._data(handler)[key]
+        return sum(item is not None for item in found)
+
+    def cmd_exists(self, handler, *keys):
+        with self.lock:
+            return sum(self._get(handler, key) is not None for key in keys)
+
+    def _incrby(self, handler, key, delta):
+        value, expires = self._get(handler, key) or (b'0', None)
+        try:
+            value = int(value) + int(delta)
+        except ValueError:
+            return RedisError('ERR value is not an integer')
+        self._data(handler)[key] = (b'%d' % value, expires)
+        return value
+
+    def cmd_incrby(self, handler, key, delta):
+        with self.lock:
+            return self._incrby(handler, key, delta)
+
+    def cmd_eval(self, handler, script, numkeys, *args):
+        # Вместо Lua известен только скрипт INCR_EXISTING из RedisCache.
+        if script.decode() != INCR_EXISTING:
+            return RedisError('ERR unknown script')
+        key, delta = args
+        with self.lock:
+            if self._get(handler, key) is None:
+                return None
+            return self._incrby(handler, key, delta)
+
+    def cmd_pexpire(self, handler, key, milliseconds):
+        with self.lock:
+            item = self._get(handler, key)
+            if item is None:
+                return 0
+            expires = time.monotonic() + int(milliseconds) / 1000
+            self._data(handler)[key] = (item[0], expires)
+        return 1
+
+    def cmd_expire(self, handler, key, seconds):
+        return self.cmd_pexpire(handler, key, int(seconds) * 1000)
+
+    def cmd_persist(self, handler, key):
+        with self.lock:
+            item = self._get(handler, key)
+            if item is None or item[1] is None:
+                return 0
+            self._data(handler)[key] = (item[0], None)
+        return 1
+
+    def cmd_flushdb(self, handler):
+        with self.lock:
+            self._data(handler).clear()
+        return 'OK'
+
+    def cmd_publish(self, handler, channel, message):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.send_message(channel, message)
+            except OSError:
+                pass
+        return len(subscribers)
@@ -0,0 +1,14 @@
+"""Настройка новых соединений с базой."""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Выполняет PRAGMA из settings.SQLITE_PRAGMAS для соединения SQLite.
+
+    Запросы идут в обход курсора Django, чтобы не попадать в счётчики
+    запросов и бюджеты страниц.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Компилирует шаблоны проекта и сообщает об ошибках в них.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        done, errors = warm_templates()
+        elapsed = (time.perf_counter() - started) * 1000
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {done} за {elapsed:.0f} мс'))
@@ -0,0 +1,74 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление сделало больше запросов, чем разрешено бюджетом."""
+
+
+class QueryCounter:
+    """Считает запросы и их суммарное время на всех подключениях к базе."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def get_query_budget(view_name):
+    """Бюджет запросов для имени URL вида 'posts:index' или None."""
+    return settings.QUERY_BUDGETS.get(view_name)
+
+
+class QueryBudgetMiddleware:
+    """Отдаёт число и время запросов в Server-Timing и следит за бюджетом.
+
+    Бюджеты задаются в settings.QUERY_BUDGETS по имени URL. При
+    превышении пишется предупреждение, а при QUERY_BUDGET_STRICT
+    поднимается QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        timing = (f'db;dur={counter.duration * 1000:.1f};'
+                  f'desc="{counter.count} queries"')
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        budget = get_query_budget(view_name)
+        if budget is not None and counter.count > budget:
+            message = (f'{view_name}: {counter.count} запросов к базе '
+                       f'при бюджете {budget} ({request.path})')
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
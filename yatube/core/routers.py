@@ -0,0 +1,115 @@
+"""Чтение лент с реплик базы.
+
+Реплики перечисляются в settings.DATABASE_REPLICAS. С них читаются
+только модели приложений из REPLICA_APPS и только внутри безопасных
+запросов, которые ReplicaMiddleware разрешил отдавать с реплик. После
+первой записи запрос и следующие REPLICA_PIN_SECONDS секунд запросы
+того же браузера читают с основной базы, чтобы автор сразу видел
+свой пост или подписку.
+
+Реплики отстают до следующего sync_replicas. Всё, что строится по
+прочитанному с них (фрагменты feed_cache, ETag), помечается отметкой
+синхронизации replica_stamp(), чтобы после неё кэш не отдавал старое.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Разрешает чтение с реплик в пределах блока и отслеживает запись."""
+    previous = getattr(_state, 'replicas', False), getattr(
+        _state, 'wrote', False)
+    _state.replicas, _state.wrote = enabled, False
+    try:
+        yield _state
+    finally:
+        _state.replicas, _state.wrote = previous
+
+
+def _stamp_path(alias):
+    return settings.DATABASES[alias]['NAME'] + '.synced'
+
+
+def mark_synced(alias):
+    """Записывает отметку синхронизации реплики рядом с её файлом."""
+    with open(_stamp_path(alias), 'w') as out:
+        out.write(str(time.time_ns()))
+
+
+def reading_replicas():
+    return bool(settings.DATABASE_REPLICAS
+                and getattr(_state, 'replicas', False)
+                and not getattr(_state, 'wrote', False))
+
+
+def replica_stamp():
+    """Отметка самой старой синхронизации, если запрос читает с реплик."""
+    if not reading_replicas():
+        return None
+    stamps = []
+    for alias in settings.DATABASE_REPLICAS:
+        try:
+            with open(_stamp_path(alias)) as source:
+                stamps.append(int(source.read() or 0))
+        except (OSError, ValueError):
+            stamps.append(0)
+    return min(stamps)
+
+
+class ReplicaRouter:
+    """Отправляет чтение на случайную реплику, а запись - в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        if (not reading_replicas()
+                or model._meta.app_label not in settings.REPLICA_APPS):
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Включает чтение с реплик и закрепляет автора записи за основной
+    базой.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        enabled = (request.method in SAFE_METHODS
+                   and settings.REPLICA_PIN_COOKIE not in request.COOKIES)
+        with replica_reads(enabled) as state:
+            response = self.get_response(request)
+            wrote = state.wrote
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
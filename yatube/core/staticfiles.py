@@ -0,0 +1,164 @@
+"""Статика с хешем в имени, сжатыми копиями и отдачей мимо Django.
+
+collectstatic с CompressedManifestStaticFilesStorage кладёт в
+STATIC_ROOT файлы вида bootstrap.min.<хеш>.css и рядом их сжатые копии
+.gz (и .br, если установлен пакет brotli). StaticFiles оборачивает
+WSGI-приложение и отдаёт эти файлы сам: сжатую копию по
+Accept-Encoding, для имён с хешем - с кэшем на год.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+from email.utils import formatdate
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Уже сжатые форматы (png, jpg, woff2) повторно не сжимаются.
+COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.txt', '.json',
+                       '.map', '.html', '.xml')
+# Сжатая копия хранится, только если она заметно меньше.
+COMPRESS_MIN_RATIO = 0.95
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress(path):
+    """Пишет path.gz и path.br рядом с файлом, если это окупается."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    written = []
+    for suffix, packed in variants:
+        if len(packed) < len(data) * COMPRESS_MIN_RATIO:
+            with open(path + suffix, 'wb') as out:
+                out.write(packed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хешами имён и сжатые копии текстовых файлов."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        targets = set()
+        processed = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, done in processed:
+            yield name, hashed_name, done
+            if done and not isinstance(done, Exception):
+                targets.update((name, hashed_name))
+        if dry_run:
+            return
+        # Сжимаются окончательные версии после всех проходов замены URL.
+        for target in sorted(targets):
+            if target.lower().endswith(COMPRESS_EXTENSIONS):
+                compress(self.path(target))
+
+
+class StaticFiles:
+    """WSGI-слой, отдающий собранную статику без вызова Django.
+
+    Файлы STATIC_ROOT индексируются один раз при запуске, после
+    collectstatic процесс нужно перезапустить. Неизвестные пути
+    передаются дальше в приложение.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = self._index() if self.root else {}
+
+    def _hashed_names(self):
+        storage = ManifestStaticFilesStorage(location=self.root)
+        return set(storage.load_manifest().values())
+
+    def _index(self):
+        if not os.path.isdir(self.root):
+            return {}
+        hashed = self._hashed_names()
+        files = {}
+        for directory, _, names in os.walk(self.root):
+            for filename in names:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if name.endswith(('.gz', '.br')):
+                    continue
+                files[name] = self._describe(path, name in hashed)
+        return files
+
+    def _describe(self, path, immutable):
+        stat = os.stat(path)
+        content_type, _ = mimetypes.guess_type(path)
+        max_age = (settings.STATIC_HASHED_MAX_AGE if immutable
+                   else settings.STATIC_MAX_AGE)
+        cache_control = f'public, max-age={max_age}'
+        if immutable:
+            cache_control += ', immutable'
+        variants = [(encoding, path + suffix)
+                    for encoding, suffix in ENCODINGS
+                    if os.path.exists(path + suffix)]
+        return {
+            'path': path,
+            'variants': variants,
+            'headers': [
+                ('Content-Type', content_type or 'application/octet-stream'),
+                ('Cache-Control', cache_control),
+                ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+                # Слабый ETag общий для исходного файла и сжатых копий.
+                ('ETag', f'W/"{int(stat.st_mtime):x}-{stat.st_size:x}"'),
+            ],
+        }
+
+    def _lookup(self, environ):
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            return None
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.prefix):
+            return None
+        name = posixpath.normpath(path[len(self.prefix):])
+        return self.files.get(name)
+
+    def __call__(self, environ, start_response):
+        info = self._lookup(environ)
+        if info is None:
+            return self.application(environ, start_response)
+        headers = list(info['headers'])
+        if info['variants']:
+            headers.append(('Vary', 'Accept-Encoding'))
+        etag = dict(headers)['ETag']
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            start_response('304 Not Modified', headers)
+            return []
+        path = info['path']
+        accepted = {
+            part.split(';')[0].strip()
+            for part in environ.get('HTTP_ACCEPT_ENCODING', '').split(',')}
+        for encoding, variant in info['variants']:
+            if encoding in accepted:
+                path = variant
+                headers.append(('Content-Encoding', encoding))
+                break
+        headers.append(('Content-Length', str(os.path.getsize(path))))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        source = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(source, self.chunk_size)
+        return self._iterate(source)
+
+    def _iterate(self, source):
+        with source:
+            for chunk in iter(lambda: source.read(self.chunk_size), b''):
+                yield chunk
@@ -0,0 +1,33 @@
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from .middleware import get_query_budget
+
+
+class QueryBudgetTestMixin:
+    """Проверка бюджета запросов из settings.QUERY_BUDGETS в TestCase."""
+
+    def captureQueries(self, client, address, **kwargs):
+        """Ответ и SQL запросов ко всем базам, включая реплики."""
+        with ExitStack() as stack:
+            contexts = [
+                stack.enter_context(CaptureQueriesContext(connection))
+                for connection in connections.all()]
+            response = client.get(address, **kwargs)
+        executed = [query['sql'] for context in contexts
+                    for query in context.captured_queries]
+        return response, executed
+
+    def assertWithinQueryBudget(self, client, address, **kwargs):
+        response, executed = self.captureQueries(client, address, **kwargs)
+        view_name = response.resolver_match.view_name
+        budget = get_query_budget(view_name)
+        self.assertIsNotNone(
+            budget, f'Для {view_name} не задан бюджет в QUERY_BUDGETS')
+        self.assertLessEqual(
+            len(executed), budget,
+            f'{view_name} ({address}) сделал {len(executed)} запросов '
+            f'при бюджете {budget}:\n' + '\n'.join(executed))
+        return response
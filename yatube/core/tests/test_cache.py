@@ -0,0 +1,177 @@
+import socket
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache import RedisCache
+from core.cache.backend import Shared
+from core.cache.local import LocalCache
+from core.cache.server import StandInServer
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class LocalCacheTest(SimpleTestCase):
+
+    def test_size_limit_evicts_least_recent(self):
+        local = LocalCache(size=2, ttl=60)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        self.assertEqual(local.get('a'), 1)
+        self.assertIsNone(local.get('b', None))
+        self.assertEqual(len(local), 2)
+
+    def test_ttl(self):
+        local = LocalCache(size=10, ttl=0.05)
+        local.set('a', 1)
+        local.set('b', 2, ttl=60)
+        time.sleep(0.06)
+        self.assertIsNone(local.get('a', None))
+        self.assertIsNone(local.get('b', None))
+
+
+class RedisCacheTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StandInServer()
+        cls.url = cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def make_cache(self, **options):
+        """Кэш с отдельными соединениями и L1, как в другом процессе."""
+        cache = RedisCache(self.url, {'OPTIONS': options})
+        shared = Shared(*cache.config)
+        self.addCleanup(shared.close)
+        cache.attach(shared)
+        if cache.invalidator is not None:
+            cache.invalidator.ready.wait(2)
+        return cache
+
+    def setUp(self):
+        self.cache = self.make_cache()
+        self.cache.clear()
+        self.server.commands.clear()
+
+    def test_basic_operations(self):
+        """Запись, чтение, add, incr и удаление через сервер."""
+        cache = self.make_cache(L1_SIZE=0)
+        cache.set('post', {'text': 'Текст'})
+        self.assertEqual(cache.get('post'), {'text': 'Текст'})
+        self.assertFalse(cache.add('post', 'другое'))
+        self.assertTrue(cache.add('group', 'slug'))
+        cache.set('views', 1)
+        self.assertEqual(cache.incr('views', 5), 6)
+        self.assertEqual(cache.get('views'), 6)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+        self.assertEqual(
+            cache.get_many(['post', 'views', 'missing']),
+            {'post': {'text': 'Текст'}, 'views': 6})
+        self.assertTrue(cache.delete('post'))
+        self.assertIsNone(cache.get('post'))
+        self.assertEqual(cache.get('post', 'default'), 'default')
+
+    def test_expiry(self):
+        cache = self.make_cache(L1_SIZE=0)
+        cache.set('short', 'value', timeout=0.05)
+        cache.set('long', 'value', timeout=None)
+        self.assertTrue(cache.touch('long', 0.05))
+        time.sleep(0.07)
+        self.assertIsNone(cache.get('short'))
+        self.assertIsNone(cache.get('long'))
+        self.assertFalse(cache.touch('long'))
+
+    def test_local_hit_skips_network(self):
+        """Повторное чтение горячего ключа не отправляет команд."""
+        self.cache.set('hot', 'value')
+        other = self.make_cache()
+        self.assertEqual(other.get('hot'), 'value')
+        self.server.commands.clear()
+        for _ in range(10):
+            self.assertEqual(other.get('hot'), 'value')
+        self.assertEqual(self.server.commands['GET'], 0)
+
+    def test_invalidation_reaches_other_processes(self):
+        """Запись в одном экземпляре убирает ключ из L1 другого."""
+        other = self.make_cache()
+        self.cache.set('post', 'old')
+        self.assertEqual(other.get('post'), 'old')
+        self.cache.set('post', 'new')
+        self.assertTrue(wait_for(lambda: other.get('post') == 'new'))
+        self.cache.delete('post')
+        self.assertTrue(wait_for(lambda: other.get('post') is None))
+
+    def test_set_many_is_one_round_trip(self):
+        """set_many отправляет все ключи одним pipeline и одним соединением."""
+        connections = self.server.connections
+        self.cache.set_many({f'key{i}': i for i in range(50)})
+        self.assertEqual(self.cache.get_many(['key0', 'key49']),
+                         {'key0': 0, 'key49': 49})
+        self.assertEqual(self.server.commands['SET'], 50)
+        self.assertEqual(self.server.connections, connections)
+
+    def test_threads_share_process_state(self):
+        """Экземпляры кэша разных потоков делят пул, L1 и подписку."""
+        first = RedisCache(self.url, {})
+        second = RedisCache(self.url, {})
+        first._ensure_process()
+        second._ensure_process()
+        self.assertIs(first.local, second.local)
+        self.assertIs(first.client, second.client)
+
+    def test_local_hits_return_copies(self):
+        """Изменение полученного значения не портит его в L1."""
+        self.cache.set('list', [1, 2])
+        self.cache.get('list').append(3)
+        self.cache.get_many(['list'])['list'].append(4)
+        self.assertEqual(self.cache.get('list'), [1, 2])
+
+    def test_incr_does_not_recreate_missing_key(self):
+        """incr не создаёт ключ, которого уже нет на сервере."""
+        with self.assertRaises(ValueError):
+            self.cache.incr('gone')
+        self.assertIsNone(self.make_cache(L1_SIZE=0).get('gone'))
+        self.assertEqual(self.server.commands['INCRBY'], 0)
+
+
+class UnavailableRedisTest(SimpleTestCase):
+    """Недоступный сервер даёт промахи, а не ошибки."""
+
+    def setUp(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        self.cache = RedisCache(
+            f'redis://127.0.0.1:{port}/0', {'OPTIONS': {'L1_SIZE': 0}})
+        shared = Shared(*self.cache.config)
+        self.addCleanup(shared.close)
+        self.cache.attach(shared)
+
+    def test_operations_degrade(self):
+        with self.assertLogs('core.cache.backend', 'WARNING'):
+            self.assertEqual(self.cache.get('key', 'нет'), 'нет')
+            self.assertEqual(self.cache.get_many(['key']), {})
+            self.cache.set('key', 1)
+            self.cache.set_many({'a': 1})
+            self.assertTrue(self.cache.add('key', 1))
+            self.assertFalse(self.cache.delete('key'))
+            self.cache.delete_many(['a'])
+            self.assertFalse(self.cache.has_key('key'))
+            self.cache.clear()
+            with self.assertRaises(ValueError):
+                self.cache.incr('key')
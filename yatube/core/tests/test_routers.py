@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.routers import ReplicaRouter, replica_reads
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTest(TestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_outside_requests_use_primary(self):
+        """Вне запросов чтение идёт с основной базы."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_feed_reads_use_replicas(self):
+        """В разрешённом запросе посты читаются с реплик."""
+        with replica_reads():
+            self.assertIn(self.router.db_for_read(Post),
+                          settings.DATABASE_REPLICAS)
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_write_pins_primary(self):
+        """После записи чтение в том же запросе идёт с основной базы."""
+        with replica_reads() as state:
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaStickinessTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='sticky')
+        cls.author = User.objects.create_user(username='followed')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_write_sets_pin_cookie(self):
+        """Подписка закрепляет браузер за основной базой на время."""
+        response = self.authorized_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,)))
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+    def test_read_does_not_set_pin_cookie(self):
+        """Чтение ленты не закрепляет браузер за основной базой."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+
+class ReplicaFileTest(TransactionTestCase):
+    """Реплика - настоящая копия базы в файле, её обновляет sync_replicas."""
+
+    alias = 'replica_file'
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        connections.databases[self.alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults(self.alias)
+        connections.prepare_test_settings(self.alias)
+        self.addCleanup(self.drop_alias)
+        replicas = override_settings(DATABASE_REPLICAS=[self.alias])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        self.author = User.objects.create_user(username='writer')
+
+    def drop_alias(self):
+        connections[self.alias].close()
+        del connections.databases[self.alias]
+        if hasattr(connections._connections, self.alias):
+            delattr(connections._connections, self.alias)
+
+    def sync(self):
+        call_command('sync_replicas', stdout=StringIO())
+
+    def post(self, text):
+        return Post.objects.create(author=self.author, text=text)
+
+    def test_replica_lags_until_sync(self):
+        self.post('Первый')
+        self.sync()
+        self.post('Второй')
+        with replica_reads():
+            self.assertEqual(Post.objects.count(), 1)
+        self.sync()
+        with replica_reads():
+            self.assertEqual(Post.objects.count(), 2)
+
+    def test_cached_feed_and_etag_refresh_after_sync(self):
+        """Страница, собранная по отставшей реплике, не живёт после sync."""
+        self.post('Первый')
+        self.sync()
+        self.post('Второй')
+        stale = self.client.get(reverse('posts:index'))
+        self.assertNotContains(stale, 'Второй')
+        self.assertEqual(self.client.get(
+            reverse('posts:index'),
+            HTTP_IF_NONE_MATCH=stale['ETag']).status_code, 304)
+        self.sync()
+        fresh = self.client.get(
+            reverse('posts:index'), HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertContains(fresh, 'Второй')
+
+    def test_pinned_writer_reads_primary(self):
+        self.sync()
+        self.post('Свежий')
+        self.client.cookies[settings.REPLICA_PIN_COOKIE] = '1'
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'Свежий')
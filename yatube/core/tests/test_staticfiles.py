@@ -0,0 +1,85 @@
+import gzip
+import shutil
+import tempfile
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.staticfiles import StaticFiles
+
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'),
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'])
+class StaticPipelineTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name(CSS)
+        cls.app = StaticFiles(cls.django_app)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    @staticmethod
+    def django_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'django']
+
+    def request(self, path, **environ):
+        environ.update(PATH_INFO=path)
+        setup_testing_defaults(environ)
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_collected_files_are_hashed_and_compressed(self):
+        self.assertRegex(
+            self.hashed, r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        with staticfiles_storage.open(self.hashed) as source:
+            original = source.read()
+        with open(staticfiles_storage.path(self.hashed) + '.gz', 'rb') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), original)
+
+    def test_hashed_name_cached_for_a_year(self):
+        """Файл с хешем отдаётся сжатым и с кэшем на год."""
+        status, headers, body = self.request(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+    def test_plain_name_revalidated(self):
+        status, headers, body = self.request('/static/' + CSS)
+        self.assertEqual(status, '200 OK')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertNotIn('immutable', headers['Cache-Control'])
+        status, _, body = self.request(
+            '/static/' + CSS, HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_other_paths_reach_django(self):
+        for path in ('/', '/static/missing.css', '/static/../settings.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)[2], b'django')
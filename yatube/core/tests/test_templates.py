@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.warmup import warm_on_boot, warm_templates
+
+CACHED_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'DIRS': [settings.TEMPLATES_DIR],
+    'OPTIONS': {
+        'context_processors': settings.TEMPLATES[0]['OPTIONS'][
+            'context_processors'],
+        'loaders': [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])],
+    },
+}]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class WarmTemplatesTest(SimpleTestCase):
+
+    def test_project_templates_land_in_loader_cache(self):
+        done, errors = warm_templates()
+        self.assertEqual(errors, {})
+        loader = engines['django'].engine.template_loaders[0]
+        cached = {key for key in loader.get_template_cache}
+        for name in ('base.html', 'posts/index.html',
+                     'includes/one_post.html', 'core/404.html'):
+            self.assertIn(name, cached)
+        self.assertEqual(done, len(cached))
+        # Шаблоны Django (admin) заранее не компилируются.
+        self.assertNotIn('admin/base.html', cached)
+
+    def test_command_reports_syntax_errors(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with open(os.path.join(directory, 'broken.html'), 'w') as out:
+            out.write('{% if %}')
+        templates = [dict(CACHED_TEMPLATES[0],
+                          DIRS=[settings.TEMPLATES_DIR, directory])]
+        with override_settings(TEMPLATES=templates):
+            with self.assertRaises(CommandError):
+                call_command('warm_templates', stdout=StringIO(),
+                             stderr=StringIO())
+
+    def test_boot_logs_syntax_errors(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with open(os.path.join(directory, 'broken.html'), 'w') as out:
+            out.write('{% if %}')
+        templates = [dict(CACHED_TEMPLATES[0],
+                          DIRS=[settings.TEMPLATES_DIR, directory])]
+        with override_settings(TEMPLATES=templates):
+            with self.assertLogs('core.warmup', 'ERROR') as logs:
+                _, errors = warm_on_boot()
+        self.assertEqual(list(errors), ['broken.html'])
+        self.assertIn('broken.html', logs.output[0])
+
+    def test_command_succeeds(self):
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn('Скомпилировано шаблонов', out.getvalue())
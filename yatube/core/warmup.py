@@ -0,0 +1,76 @@
+"""Подготовка процесса к первым запросам.
+
+Шаблоны проекта компилируются заранее: с cached.Loader результат
+остаётся в памяти, и при preload в мастер-процессе воркеры получают
+его после fork без повторного разбора.
+"""
+import gc
+import logging
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+logger = logging.getLogger(__name__)
+
+
+def project_template_dirs(engine):
+    """Каталоги шаблонов проекта без шаблонов самого Django."""
+    root = os.path.join(os.path.abspath(settings.BASE_DIR), '')
+    # Без APP_DIRS (cached.Loader) template_dirs не включает каталоги
+    # приложений, хотя app_directories.Loader их читает.
+    directories = list(engine.dirs) + list(get_app_template_dirs('templates'))
+    return [directory for directory in dict.fromkeys(directories)
+            if os.path.abspath(directory).startswith(root)]
+
+
+def template_names(directory):
+    for path, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                name = os.path.relpath(os.path.join(path, filename),
+                                       directory)
+                yield name.replace(os.sep, '/')
+
+
+def warm_templates():
+    """Компилирует шаблоны проекта; возвращает (готово, {имя: ошибка})."""
+    done, errors = 0, {}
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in project_template_dirs(engine):
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except Exception as error:
+                    errors[name] = error
+                else:
+                    done += 1
+    return done, errors
+
+
+def warm_on_boot():
+    """Компилирует шаблоны при запуске и пишет их ошибки в лог.
+
+    Иначе сломанный шаблон обнаружится только на первом запросе к нему.
+    """
+    done, errors = warm_templates()
+    for name, error in errors.items():
+        logger.error('Шаблон %s не компилируется: %s', name, error)
+    return done, errors
+
+
+def before_fork():
+    """Готовит загруженное приложение к fork воркеров."""
+    # Открытое соединение нельзя делить между процессами.
+    connections.close_all()
+    gc.collect()
+    # Объекты, созданные при загрузке, выводятся из-под сборщика: его
+    # проходы в воркерах не пишут в их страницы, и те остаются общими.
+    gc.freeze()
@@ -0,0 +1,20 @@
+"""Настройки gunicorn, запуск командой gunicorn из каталога с manage.py.
+
+Приложение загружается в мастер-процессе до fork (preload_app), поэтому
+импорт Django, приложений и компиляция шаблонов идут один раз, а
+воркеры получают эту память через copy-on-write.
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'yatube.wsgi:application'
+bind = os.environ.get('YATUBE_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get(
+    'YATUBE_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def pre_fork(server, worker):
+    from core.warmup import before_fork
+
+    before_fork()
@@ -1,21 +1,92 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
 
 from .models import Group, Post, Comment
 
 
-class PostAdmin(admin.ModelAdmin):
+class EstimatedCountPaginator(Paginator):
+    """Paginator без COUNT(*) по всей большой таблице.
+
+    Точно считается не больше ADMIN_EXACT_COUNT_LIMIT строк. Если их
+    больше, для всей таблицы количество оценивается по наибольшему id,
+    а для отфильтрованного списка остаётся limit + 1 ("больше limit"):
+    оценка по всей таблице дала бы страницы, которых нет.
+    """
+
+    capped = False
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        exact = self.object_list.order_by()[:limit + 1].count()
+        if exact <= limit:
+            return exact
+        if self.object_list.query.where:
+            self.capped = True
+            return exact
+        model = self.object_list.model
+        estimate = model._default_manager.aggregate(last=Max('pk'))['last']
+        return max(estimate or 0, exact)
+
+    @property
+    def exact_limit(self):
+        return settings.ADMIN_EXACT_COUNT_LIMIT
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Варианты выбора загружаются один раз на все строки списка."""
+
+    def __init__(self, *args, **kwargs):
+        # Общий словарь переживает копирование поля в каждую форму.
+        self._shared = {}
+        # Варианты строятся уже при присвоении queryset в __init__.
+        self.to_field_name = kwargs.get('to_field_name')
+        super().__init__(*args, **kwargs)
+
+    def _get_choices(self):
+        if 'choices' not in self._shared:
+            self._shared['choices'] = list(super()._get_choices())
+        return self._shared['choices']
+
+    choices = property(_get_choices, forms.ChoiceField._set_choices)
+
+
+class PerformanceModeAdmin(admin.ModelAdmin):
+    """Список без полного подсчёта строк и повторных запросов на строку."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    cached_choice_fields = ()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.cached_choice_fields:
+            kwargs.setdefault('form_class', CachedModelChoiceField)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class PostAdmin(PerformanceModeAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
     list_editable = ('group',)
+    cached_choice_fields = ('group',)
+    autocomplete_fields = ('author',)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(PerformanceModeAdmin):
     list_display = ('pk', 'text', 'author', 'created')
-    search_fields = ('text', 'author')
+    list_select_related = ('author',)
+    search_fields = ('text', 'author__username')
     list_filter = ('created',)
     empty_value_display = '-пусто-'
+    autocomplete_fields = ('author', 'post')
 
 
 admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,95 @@
+"""JSON-чтение лент для клиентов без разбора HTML.
+
+Поля выбираются параметром ?fields=id,text,author: из базы читаются
+только их столбцы (values), а таблицы авторов и групп присоединяются,
+только если запрошено их поле. Страницы листаются курсором ?after=,
+ответ отдаётся потоком по одному посту.
+"""
+import json
+
+from django.conf import settings
+
+from .models import Post
+from .utils import CursorPaginator
+
+# Имя поля в ответе -> путь в ORM.
+FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+# Ключ курсора читается всегда.
+CURSOR_FIELDS = ('pk', 'pub_date')
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def parse_fields(value):
+    """Список полей из ?fields=; без параметра - все поля."""
+    if not value:
+        return list(FIELDS)
+    names = list(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown or not names:
+        raise ValueError(
+            'Неизвестные поля: ' + ', '.join(unknown or [value]))
+    return names
+
+
+def parse_limit(value):
+    """Размер страницы из ?limit=, от 1 до API_MAX_PER_PAGE."""
+    if not value:
+        return settings.POSTS_PER_PAGE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.API_MAX_PER_PAGE:
+        raise ValueError(
+            f'limit должен быть от 1 до {settings.API_MAX_PER_PAGE}')
+    return limit
+
+
+def get_page(queryset, fields, after=None, per_page=None):
+    """Страница словарей только с нужными столбцами."""
+    lookups = set(CURSOR_FIELDS)
+    lookups.update(FIELDS[name] for name in fields)
+    paginator = CursorPaginator(
+        queryset.values(*lookups), per_page or settings.POSTS_PER_PAGE)
+    return paginator.get_page(after=after)
+
+
+def field_converters(fields):
+    """(имя, путь в ORM, преобразование) для каждого поля ответа."""
+    storage = Post._meta.get_field('image').storage
+    special = {
+        'pub_date': lambda value: value.isoformat(),
+        'updated': lambda value: value.isoformat(),
+        'image': lambda value: storage.url(value) if value else None,
+    }
+    return [(name, FIELDS[name], special.get(name)) for name in fields]
+
+
+def serialize(row, converters):
+    item = {}
+    for name, lookup, convert in converters:
+        value = row[lookup]
+        item[name] = convert(value) if convert else value
+    return _encode(item)
+
+
+def stream(page, fields):
+    """Куски JSON-ответа {"results": [...], "next": курсор}."""
+    converters = field_converters(fields)
+    yield '{"results":['
+    for number, row in enumerate(page):
+        if number:
+            yield ','
+        yield serialize(row, converters)
+    yield '],"next":%s}' % _encode(page.next_cursor)
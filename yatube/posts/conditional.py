@@ -0,0 +1,78 @@
+"""ETag для страниц лент и постов.
+
+Валидатор считается одним запросом по индексу: новейший пост ленты
+(id и дата изменения) или строка самого поста. К нему добавляются
+поколения feed_cache, которые сдвигаются при правке и удалении старых
+постов (при чтении с реплик - и отметка их синхронизации),
+пользователь и строка запроса. Если ETag совпал с If-None-Match,
+страница не строится и клиент получает 304.
+
+Last-Modified не отдаётся: страницы зависят от комментариев, счётчиков
+и зрителя, у которых нет общей даты изменения, и ответ по одной только
+дате мог бы оказаться устаревшим.
+"""
+import hashlib
+
+from django.db.models import OuterRef, Subquery
+
+from . import feed_cache
+from .models import Group, Post, User
+
+
+def _etag(request, *parts):
+    parts += (request.user.pk, request.GET.urlencode())
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _newest(queryset):
+    return queryset.order_by('-pub_date', '-pk')[:1]
+
+
+def _with_newest(queryset, posts):
+    """Добавляет к строке id и дату изменения её новейшего поста."""
+    posts = _newest(posts)
+    return queryset.annotate(
+        newest_pk=Subquery(posts.values('pk')),
+        newest_updated=Subquery(posts.values('updated')))
+
+
+def index_etag(request):
+    newest = _newest(Post.objects.values_list('pk', 'updated')).first()
+    return _etag(request, newest, feed_cache.version('index'))
+
+
+def group_etag(request, slug):
+    row = _with_newest(
+        Group.objects.filter(slug=slug),
+        Post.objects.filter(group=OuterRef('pk')),
+    ).values_list('pk', 'title', 'description',
+                  'newest_pk', 'newest_updated').first()
+    if row is None:
+        return None
+    return _etag(request, row, feed_cache.version(f'group:{row[0]}'))
+
+
+def profile_etag(request, username):
+    row = _with_newest(
+        User.objects.filter(username=username),
+        Post.objects.filter(author=OuterRef('pk')),
+    ).values_list('pk', 'counters__posts_count', 'counters__followers_count',
+                  'counters__following_count',
+                  'newest_pk', 'newest_updated').first()
+    if row is None:
+        return None
+    namespaces = [f'author:{row[0]}']
+    if request.user.is_authenticated:
+        # Кнопка подписки зависит от подписок зрителя.
+        namespaces.append(f'follow:{request.user.pk}')
+    return _etag(request, row, feed_cache.version(*namespaces))
+
+
+def post_etag(request, post_id):
+    row = Post.objects.filter(pk=post_id).values_list(
+        'pub_date', 'updated', 'comments_count',
+        'author__counters__posts_count').first()
+    if row is None:
+        return None
+    return _etag(request, row, feed_cache.version(f'post:{post_id}'))
@@ -0,0 +1,67 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными UPDATE ... SET n = n + delta в той же
+транзакции, что и запись, которая их затрагивает. Расхождения чинит
+команда ``manage.py recount``.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserCounter
+
+
+def _deltas(**deltas):
+    return {field: Greatest(F(field) + delta, 0)
+            for field, delta in deltas.items() if delta}
+
+
+def change_user(user_ids, **deltas):
+    """Меняет счётчики пользователей; строки создаются только для роста."""
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
+    updates = _deltas(**deltas)
+    if not updates or not user_ids:
+        return
+    updated = UserCounter.objects.filter(user_id__in=user_ids).update(
+        **updates)
+    if updated == len(user_ids) or min(deltas.values()) < 0:
+        return
+    existing = set(UserCounter.objects.filter(
+        user_id__in=user_ids).values_list('user_id', flat=True))
+    UserCounter.objects.bulk_create(
+        [UserCounter(user_id=user_id, **deltas)
+         for user_id in user_ids if user_id not in existing],
+        ignore_conflicts=True)
+
+
+def change_group(group_id, delta):
+    if group_id and delta:
+        Group.objects.filter(pk=group_id).update(**_deltas(posts_count=delta))
+
+
+def change_post(post_id, delta):
+    if delta:
+        Post.objects.filter(pk=post_id).update(
+            **_deltas(comments_count=delta))
+
+
+def _count_of(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(n=Count('pk')).values('n')
+    ), 0)
+
+
+def recount():
+    """Пересчитывает все счётчики по исходным таблицам."""
+    missing = User.objects.filter(counters__isnull=True).values_list(
+        'pk', flat=True)
+    UserCounter.objects.bulk_create(
+        [UserCounter(user_id=pk) for pk in missing],
+        batch_size=500, ignore_conflicts=True)
+    UserCounter.objects.update(
+        posts_count=_count_of(Post, 'author'),
+        followers_count=_count_of(Follow, 'author'),
+        following_count=_count_of(Follow, 'user'))
+    Group.objects.update(posts_count=_count_of(Post, 'group'))
+    Post.objects.update(comments_count=_count_of(Comment, 'post'))
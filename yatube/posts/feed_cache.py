@@ -0,0 +1,72 @@
+"""Версионированный кэш фрагментов лент.
+
+У каждого пространства имён (index, group:<id>, author:<id>, post:<id>,
+follow:<id>) есть номер поколения. Номера поколений входят в ключ
+фрагмента, поэтому запись увеличивает поколение только затронутых лент,
+а устаревшие фрагменты перестают читаться и вытесняются по TTL.
+
+Если запрос читает с реплик, к версии добавляется отметка их
+синхронизации: фрагмент, собранный по отставшей реплике, не переживает
+следующий sync_replicas.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.routers import replica_stamp
+
+
+def _key(namespace):
+    return f'feed_gen:{namespace}'
+
+
+def _initial():
+    # Поколение, потерянное при вытеснении, начинается с текущего времени,
+    # чтобы не совпасть с номером, под которым лежат старые фрагменты.
+    return int(time.time() * 1000)
+
+
+def generations(*namespaces):
+    """Номера поколений для пространств имён одним обращением к кэшу."""
+    keys = [_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(*namespaces):
+    """Сдвигает поколения, после чего старые фрагменты не читаются."""
+    for namespace in namespaces:
+        try:
+            cache.incr(_key(namespace))
+        except ValueError:
+            cache.add(_key(namespace), _initial(), None)
+
+
+def version(*namespaces):
+    parts = [str(generation) for generation in generations(*namespaces)]
+    stamp = replica_stamp()
+    if stamp is not None:
+        parts.append(f'r{stamp}')
+    return '.'.join(parts)
+
+
+def context(*namespaces):
+    """Переменные для тега {% cache %} в шаблонах лент."""
+    return {
+        'feed_version': version(*namespaces),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT,
+    }
+
+
+def post_namespaces(post, *group_ids):
+    """Ленты, в которых виден пост, включая его прежнюю группу."""
+    namespaces = {'index', f'author:{post.author_id}', f'post:{post.pk}'}
+    for group_id in {post.group_id, *group_ids}:
+        if group_id:
+            namespaces.add(f'group:{group_id}')
+    return namespaces
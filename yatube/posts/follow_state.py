@@ -0,0 +1,46 @@
+"""Подписки текущего пользователя на авторов в пределах запроса.
+
+Ответы «подписан ли request.user на X» загружаются пачкой одним
+запросом с IN и запоминаются на объекте запроса, поэтому кнопки
+подписки для N авторов не требуют N запросов.
+"""
+from .models import Follow
+
+
+class FollowState:
+    """Подписки пользователя на уже запрошенных авторов."""
+
+    def __init__(self, user):
+        self.user = user
+        self._known = {}
+
+    def load(self, author_ids):
+        """Загружает подписки на ещё не известных авторов одним запросом."""
+        missing = {pk for pk in author_ids if pk not in self._known}
+        if not missing:
+            return
+        followed = set()
+        if self.user.is_authenticated:
+            followed = set(Follow.objects.filter(
+                user=self.user, author_id__in=missing,
+            ).values_list('author_id', flat=True))
+        for pk in missing:
+            self._known[pk] = pk in followed
+
+    def is_following(self, author_id):
+        self.load([author_id])
+        return self._known[author_id]
+
+
+def get_follow_state(request):
+    state = getattr(request, '_follow_state', None)
+    if state is None:
+        state = request._follow_state = FollowState(request.user)
+    return state
+
+
+def author_id(obj):
+    """id автора для пользователя, поста или самого id."""
+    if isinstance(obj, int):
+        return obj
+    return getattr(obj, 'author_id', None) or obj.pk
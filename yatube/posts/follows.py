@@ -0,0 +1,101 @@
+"""Подписка и отписка сразу на многих авторов.
+
+Имена авторов разрешаются одним запросом, строки Follow вставляются
+через bulk_create(ignore_conflicts=True) под ограничением
+unique_follower, а счётчики, поколения кэша и ленты подписок
+обновляются один раз на пачку, а не на каждую подписку.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from . import counters, feed_cache, timelines
+from .models import Follow, User
+from .signals import muted
+
+
+def resolve(usernames):
+    """Словарь имя -> id для существующих пользователей одним запросом."""
+    return dict(User.objects.filter(username__in=set(usernames))
+                .values_list('username', 'pk'))
+
+
+def _change_counters(pairs, sign):
+    for field, counts in (
+            ('following_count', Counter(user for user, _ in pairs)),
+            ('followers_count', Counter(author for _, author in pairs))):
+        by_delta = defaultdict(list)
+        for pk, number in counts.items():
+            by_delta[sign * number].append(pk)
+        for delta, user_ids in by_delta.items():
+            counters.change_user(user_ids, **{field: delta})
+            if field == 'followers_count':
+                timelines.followers_changed(user_ids, delta)
+
+
+def _after_commit(pairs):
+    user_ids = {user for user, _ in pairs}
+    if not user_ids:
+        return
+
+    def refresh():
+        feed_cache.bump(*(f'follow:{user_id}' for user_id in user_ids))
+        timelines.invalidate(user_ids)
+    transaction.on_commit(refresh)
+
+
+@transaction.atomic
+def add_follows(pairs):
+    """Создаёт подписки (user_id, author_id); возвращает новые пары."""
+    pairs = {(user, author) for user, author in pairs if user != author}
+    if not pairs:
+        return set()
+    existing = set(Follow.objects.filter(
+        user_id__in={user for user, _ in pairs},
+        author_id__in={author for _, author in pairs},
+    ).values_list('user_id', 'author_id'))
+    new = pairs - existing
+    Follow.objects.bulk_create(
+        [Follow(user_id=user, author_id=author) for user, author in new],
+        batch_size=500, ignore_conflicts=True)
+    _change_counters(new, 1)
+    _after_commit(new)
+    return new
+
+
+@transaction.atomic
+def remove_follows(user_id, author_ids):
+    """Удаляет подписки пользователя; возвращает id бывших авторов."""
+    follows = Follow.objects.filter(user_id=user_id, author_id__in=author_ids)
+    removed = set(follows.values_list('author_id', flat=True))
+    if not removed:
+        return removed
+    with muted():
+        follows.delete()
+    pairs = {(user_id, author) for author in removed}
+    _change_counters(pairs, -1)
+    _after_commit(pairs)
+    return removed
+
+
+def follow_usernames(user, usernames):
+    """Подписывает пользователя на авторов по именам."""
+    authors = resolve(usernames)
+    new = add_follows((user.pk, pk) for pk in authors.values())
+    added = {author for _, author in new}
+    return {
+        'followed': sorted(name for name, pk in authors.items()
+                           if pk in added),
+        'missing': sorted(set(usernames) - set(authors)),
+    }
+
+
+def unfollow_usernames(user, usernames):
+    """Отписывает пользователя от авторов по именам."""
+    authors = resolve(usernames)
+    removed = remove_follows(user.pk, list(authors.values()))
+    return {
+        'unfollowed': sorted(name for name, pk in authors.items()
+                             if pk in removed),
+        'missing': sorted(set(usernames) - set(authors)),
+    }
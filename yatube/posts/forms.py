@@ -1,14 +1,28 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
+from . import thumbnails
 from .models import Comment, Post
 
 
+class PostImageField(forms.ImageField):
+    """Картинка поста с учётом проверок ImageUploadHandler."""
+
+    def to_python(self, data):
+        upload_error = getattr(data, 'upload_error', None)
+        if upload_error:
+            raise forms.ValidationError(upload_error, code='invalid_image')
+        return super().to_python(data)
+
+
 class PostForm(forms.ModelForm):
 
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {
+            'image': PostImageField,
+        }
         labels = {
             'text': 'Текст поста',
             'group': 'Группа поста',
@@ -24,6 +38,15 @@ class PostForm(forms.ModelForm):
             'Введите какой нибудь текст, ну пожалуйста 🥺')
         self.fields['group'].empty_label = ('Выберите группу 👀')
 
+    def save(self, commit=True):
+        image_changed = 'image' in self.changed_data
+        if image_changed:
+            self.instance.thumbnails = ''
+        post = super().save(commit=commit)
+        if commit and image_changed and post.image:
+            thumbnails.schedule(post.pk)
+        return post
+
 
 class CommentForm(forms.ModelForm):
 
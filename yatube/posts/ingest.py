@@ -0,0 +1,140 @@
+"""Буферизованная запись комментариев.
+
+При COMMENT_BUFFER_ENABLED проверенные комментарии не пишутся в базу в
+запросе, а попадают в очередь. Фоновый поток собирает их в пачки по
+COMMENT_BUFFER_BATCH_SIZE или за COMMENT_BUFFER_INTERVAL секунд и
+сохраняет одним bulk_create, после чего один раз на пачку обновляет
+счётчики комментариев и поколения кэша постов. При
+COMMENT_BUFFER_DURABLE запрос ждёт фиксации своей пачки.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from . import counters, feed_cache
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+class CommentBuffer:
+    """Очередь комментариев и поток, сбрасывающий её пачками."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.join)
+
+    def submit(self, comment):
+        """Ставит комментарий в очередь; Future завершится после записи."""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((comment, future))
+        return future
+
+    def join(self):
+        """Ждёт, пока будут записаны все поставленные комментарии."""
+        self._queue.join()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='comment-buffer', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + settings.COMMENT_BUFFER_INTERVAL
+        while len(batch) < settings.COMMENT_BUFFER_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                connection.close_if_unusable_or_obsolete()
+                flush(batch)
+            except Exception as error:
+                logger.exception('Не удалось записать пачку комментариев')
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def flush(batch):
+    """Записывает пачку пар (комментарий, Future) и завершает Future."""
+    try:
+        with transaction.atomic():
+            _save([comment for comment, _ in batch])
+    except DatabaseError:
+        # Одна плохая строка (например, пост уже удалён) не должна
+        # терять всю пачку: пишем по одной и отказываем только ей.
+        for comment, future in batch:
+            try:
+                with transaction.atomic():
+                    _save([comment])
+            except DatabaseError as error:
+                future.set_exception(error)
+    for comment, future in batch:
+        if not future.done():
+            future.set_result(comment)
+
+
+def _save(comments):
+    Comment.objects.bulk_create(comments)
+    per_post = Counter(comment.post_id for comment in comments)
+    for post_id, delta in per_post.items():
+        counters.change_post(post_id, delta)
+    namespaces = [f'post:{post_id}' for post_id in per_post]
+    transaction.on_commit(lambda: feed_cache.bump(*namespaces))
+
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = CommentBuffer()
+        return _buffer
+
+
+def save_comment(comment):
+    """Сохраняет комментарий сразу или через буфер по настройкам.
+
+    Ошибка записи пробрасывается как DatabaseError. Если пачка не
+    зафиксирована за COMMENT_BUFFER_TIMEOUT, комментарий считается
+    принятым: он остаётся в очереди и будет записан позже, а повтор
+    запроса создал бы дубль.
+    """
+    if not settings.COMMENT_BUFFER_ENABLED:
+        with transaction.atomic():
+            comment.save()
+        return
+    future = get_buffer().submit(comment)
+    if settings.COMMENT_BUFFER_DURABLE:
+        try:
+            future.result(timeout=settings.COMMENT_BUFFER_TIMEOUT)
+        except FutureTimeout:
+            logger.warning('Комментарий к посту %s ждёт записи дольше %s с',
+                           comment.post_id, settings.COMMENT_BUFFER_TIMEOUT)
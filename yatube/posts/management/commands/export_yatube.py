@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии, подписки '
+            'и картинки в каталог NDJSON-файлов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог для выгрузки.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за один раз.')
+
+    def handle(self, *args, **options):
+        counts = export(options['directory'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Выгружено: ' + ', '.join(
+            f'{name} {count}' for name, count in counts.items())))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+class Command(BaseCommand):
+    help = 'Строит превью для постов с картинкой, у которых нет манифеста.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить превью для всех постов с картинкой.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnails='')
+        done = 0
+        for post_id in posts.values_list('pk', flat=True).iterator():
+            generate(post_id)
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f'Готово превью: {done}'))
@@ -0,0 +1,45 @@
+import csv
+import sys
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from posts.follows import add_follows, resolve
+
+
+class Command(BaseCommand):
+    help = ('Импортирует граф подписок из CSV со строками '
+            '"подписчик,автор" пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='CSV-файл или "-" для чтения из stdin.')
+        parser.add_argument(
+            '--batch-size', type=int, default=400,
+            help='Сколько пар обрабатывать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        source = (sys.stdin if options['path'] == '-'
+                  else open(options['path'], encoding='utf-8', newline=''))
+        added = skipped = 0
+        missing = set()
+        with source:
+            rows = (row for row in csv.reader(source) if len(row) >= 2)
+            while True:
+                batch = [(user.strip(), author.strip())
+                         for user, author, *_ in islice(
+                             rows, options['batch_size'])]
+                if not batch:
+                    break
+                ids = resolve({name for pair in batch for name in pair})
+                missing.update(name for pair in batch for name in pair
+                               if name not in ids)
+                pairs = {(ids[user], ids[author]) for user, author in batch
+                         if user in ids and author in ids}
+                new = add_follows(pairs)
+                added += len(new)
+                skipped += len(batch) - len(new)
+        if missing:
+            self.stderr.write('Не найдены: ' + ', '.join(sorted(missing)))
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено подписок: {added}, пропущено: {skipped}'))
@@ -0,0 +1,53 @@
+import os
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection
+
+from posts import counters
+from posts.models import Comment, Follow, Post
+from posts.transfer import CHECKPOINT, ImportConflict, Importer
+
+
+class Command(BaseCommand):
+    help = ('Загружает каталог export_yatube пачками; после сбоя '
+            'продолжает с контрольной точки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог выгрузки.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько строк сохранять за одну транзакцию.')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Забыть контрольную точку и загрузить заново.')
+
+    def handle(self, *args, **options):
+        checkpoint = os.path.join(options['directory'], CHECKPOINT)
+        if options['restart'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        importer = Importer(options['directory'], options['batch_size'])
+        if importer.state.get('finished'):
+            raise CommandError(
+                'Каталог уже загружен, для повтора добавьте --restart')
+        try:
+            counts = importer.run()
+        except ImportConflict as error:
+            raise CommandError(str(error)) from error
+        # bulk_create не шлёт сигналов: счётчики, поиск, последовательности
+        # id и кэш лент обновляются один раз в конце.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Post, Comment, Follow]):
+                cursor.execute(sql)
+        counters.recount()
+        call_command('rebuild_search_index', stdout=self.stdout)
+        cache.clear()
+        importer.state['finished'] = True
+        importer.checkpoint.save()
+        self.stdout.write(self.style.SUCCESS('Загружено: ' + ', '.join(
+            f'{name} {count}' for name, count in counts.items())))
+        self.stdout.write(
+            'Превью картинок: python manage.py generate_thumbnails')
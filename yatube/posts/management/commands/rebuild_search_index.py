@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов индексировать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        batch_size = options['batch_size']
+        backend.clear()
+        last_pk, done = 0, 0
+        while True:
+            rows = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'text')[:batch_size])
+            if not rows:
+                break
+            with transaction.atomic():
+                backend.index(rows)
+            last_pk = rows[-1][0]
+            done += len(rows)
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано: {done}'))
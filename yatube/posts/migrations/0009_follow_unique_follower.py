@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:44
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    """Оставляет по одной подписке на пару (user, author).
+
+    Ограничение unique_follower было в модели, но не в миграциях, и в
+    существующих базах могли остаться повторы, на которых оно упадёт.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    first = (Follow.objects.order_by().values('user', 'author')
+             .annotate(first=Min('pk')).values('first'))
+    Follow.objects.exclude(pk__in=first).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_auto_20220419_1106'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='follow',
+            options={},
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('author', 'user'), name='unique_follower'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -13,6 +15,8 @@ class Post(models.Model):
                             help_text='Введите текст поста')
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
+    updated = models.DateTimeField(auto_now=True,
+                                   verbose_name='Дата изменения')
     author = models.TextField(verbose_name='Автор')
     group = models.ForeignKey(
         Group,
@@ -20,26 +24,55 @@ class Post(models.Model):
         blank=True,
         null=True,
         on_delete=models.SET_NULL,
+        db_index=False,
         verbose_name='Группа',
         help_text='Группа к которой будет относится пост')
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
                                related_name='posts',
+                               db_index=False,
                                verbose_name='Автор')
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    thumbnails = models.TextField(
+        'Манифест превью',
+        blank=True,
+        default='',
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Alex Posting'
         verbose_name_plural = 'Alex Postings'
         ordering = ('-pub_date', )
+        # Индексы по возрастанию: при обратном обходе SQLite получает
+        # порядок (-pub_date, -id), нужный и страницам, и курсорам.
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @property
+    def thumbnail_url(self):
+        """URL готового превью для ленты или пустая строка."""
+        if not self.thumbnails:
+            return ''
+        return json.loads(self.thumbnails).get('card', '')
+
 
 class Group(models.Model):
     """Модель для тематических сообществ пользователей."""
@@ -47,6 +80,11 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Title')
     slug = models.SlugField(unique=True, verbose_name='Slug')
     description = models.TextField(verbose_name='Description')
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Alex Group'
@@ -61,7 +99,8 @@ class Comment(models.Model):
     post = models.ForeignKey(
         Post,
         related_name='comments',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -79,6 +118,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -89,12 +132,14 @@ class Follow(models.Model):
     user = models.ForeignKey(
         User,
         related_name='follower',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     author = models.ForeignKey(
         User,
         related_name='following',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
     class Meta:
@@ -103,6 +148,32 @@ class Follow(models.Model):
                 fields=['author', 'user'],
                 name='unique_follower')
         ]
+        indexes = [
+            models.Index(fields=['user', 'author'],
+                         name='follow_user_author_idx'),
+        ]
 
     def __str__(self):
         return f"{self.author}, follower:{self.user}"
+
+
+class UserCounter(models.Model):
+    """Счётчики постов и подписок пользователя."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='counters',
+        on_delete=models.CASCADE
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок',
+        default=0
+    )
+
+    def __str__(self):
+        return f"{self.user_id}: {self.posts_count}"
@@ -0,0 +1,133 @@
+"""Полнотекстовый поиск по постам.
+
+Бэкенд выбирается настройкой POSTS_SEARCH_BACKEND. Индекс обновляется
+сигналами сохранения и удаления постов, а полностью перестраивается
+командой ``manage.py rebuild_search_index``.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    path = settings.POSTS_SEARCH_BACKEND
+    if _backend is None or _backend.path != path:
+        _backend = import_string(path)()
+        _backend.path = path
+    return _backend
+
+
+def terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _posts_in_order(ids):
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+class BaseSearchBackend:
+    """Интерфейс бэкенда поиска."""
+
+    def index(self, rows):
+        """Добавляет или обновляет пары (id, текст)."""
+        raise NotImplementedError
+
+    def remove(self, pk):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query):
+        """Результаты, которые понимает Paginator: count() и срезы."""
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Поиск подстрокой без индекса и ранжирования."""
+
+    def index(self, rows):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query):
+        posts = Post.objects.select_related('author', 'group')
+        for term in terms(query):
+            posts = posts.filter(text__icontains=term)
+        return posts
+
+
+class RankedResults:
+    """Найденные посты в порядке BM25, загружаемые по срезам."""
+
+    def __init__(self, table, match):
+        self.table = table
+        self.match = match
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {self.table} '
+                f'WHERE {self.table} MATCH %s', [self.match])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = -1 if index.stop is None else index.stop - offset
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} '
+                f'WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}) LIMIT %s OFFSET %s',
+                [self.match, limit, offset])
+            ids = [row[0] for row in cursor.fetchall()]
+        return _posts_in_order(ids)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Инвертированный индекс SQLite FTS5 с ранжированием BM25."""
+
+    table = 'posts_post_fts'
+
+    def index(self, rows):
+        rows = list(rows)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows])
+            cursor.executemany(
+                f'INSERT INTO {self.table}(rowid, text) VALUES (%s, %s)',
+                rows)
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [pk])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, query):
+        match = ' '.join(f'"{term}"*' for term in terms(query))
+        if not match:
+            return []
+        return RankedResults(self.table, match)
@@ -0,0 +1,107 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, feed_cache, search, timelines
+from .models import Comment, Follow, Post, User, UserCounter
+
+_muted = threading.local()
+
+
+@contextmanager
+def muted():
+    """Отключает обработчики подписок в блоке.
+
+    Пакетные операции (posts.follows) обновляют счётчики и кэш сами,
+    один раз на всю пачку.
+    """
+    _muted.active = True
+    try:
+        yield
+    finally:
+        _muted.active = False
+
+
+def _is_muted():
+    return getattr(_muted, 'active', False)
+
+
+def _bump(*namespaces):
+    """Сдвигает поколения лент после фиксации транзакции.
+
+    До фиксации параллельный запрос ещё видит старые строки и сохранил
+    бы их во фрагменте под новым поколением.
+    """
+    transaction.on_commit(lambda: feed_cache.bump(*namespaces))
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    """Запоминает группу поста, чтобы обработать перенос в другую."""
+    instance._initial_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=User)
+def create_user_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounter.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    initial_group_id = getattr(instance, '_initial_group_id', None)
+    if created:
+        counters.change_user(instance.author_id, posts_count=1)
+        counters.change_group(instance.group_id, 1)
+    elif initial_group_id != instance.group_id:
+        counters.change_group(initial_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+    _bump(*feed_cache.post_namespaces(instance, initial_group_id))
+    search.get_backend().index([(instance.pk, instance.text)])
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, posts_count=-1)
+    counters.change_group(instance.group_id, -1)
+    _bump(*feed_cache.post_namespaces(
+        instance, getattr(instance, '_initial_group_id', None)))
+    search.get_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post(instance.post_id, 1)
+    _bump(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+    _bump(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if _is_muted():
+        return
+    if created:
+        counters.change_user(instance.user_id, following_count=1)
+        counters.change_user(instance.author_id, followers_count=1)
+        timelines.followers_changed([instance.author_id], 1)
+    _bump(f'follow:{instance.user_id}')
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    if _is_muted():
+        return
+    counters.change_user(instance.user_id, following_count=-1)
+    counters.change_user(instance.author_id, followers_count=-1)
+    timelines.followers_changed([instance.author_id], -1)
+    _bump(f'follow:{instance.user_id}')
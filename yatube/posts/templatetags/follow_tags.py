@@ -0,0 +1,19 @@
+from django import template
+
+from posts.follow_state import author_id, get_follow_state
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def preload_follows(context, objects):
+    """Загружает подписки на авторов списка одним запросом."""
+    get_follow_state(context['request']).load(
+        {author_id(obj) for obj in objects})
+    return ''
+
+
+@register.simple_tag(takes_context=True)
+def follows(context, obj):
+    """Подписан ли текущий пользователь на автора (или автора поста)."""
+    return get_follow_state(context['request']).is_following(author_id(obj))
@@ -0,0 +1,62 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/one_post.html'
+CURSOR_PARAMS = ('after', 'before', 'page')
+
+
+def card_key(post, group=None, profile=False):
+    """Ключ карточки меняется вместе с Post.updated при правке поста и
+    с данными автора и группы, которые выводятся в карточке.
+    """
+    stamp = int(post.updated.timestamp() * 1000000)
+    author, post_group = post.author, post.group
+    shown = '|'.join(str(value) for value in (
+        author.username, author.first_name, author.last_name,
+        post_group and post_group.slug))
+    digest = hashlib.md5(shown.encode()).hexdigest()[:12]
+    variant = 'p' if profile else 'g' if group else 'f'
+    return f'post_card:{post.pk}:{stamp}:{variant}:{digest}'
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, profile=False):
+    """Карточки постов страницы: готовые берутся из кэша одним get_many,
+    отрисовываются только недостающие. На странице автора (profile)
+    карточка без строки автора.
+    """
+    posts = list(posts)
+    group = context.get('group')
+    keys = [card_key(post, group, profile) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    for post, key in zip(posts, keys):
+        if key not in cards:
+            card = get_template(CARD_TEMPLATE).render(
+                {'post': post, 'group': group, 'profile': profile})
+            cards[key] = missing[key] = str(card)
+    if missing:
+        cache.set_many(missing, settings.FEED_CACHE_TIMEOUT)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+@register.simple_tag(takes_context=True)
+def cursor_query(context, name=None, cursor=None):
+    """Строка запроса текущей страницы с заменённым курсором.
+
+    Остальные параметры (например, q поиска) сохраняются; без name
+    получается ссылка на первую страницу.
+    """
+    query = context['request'].GET.copy()
+    for param in CURSOR_PARAMS:
+        query.pop(param, None)
+    if name:
+        query[name] = cursor
+    return query.urlencode()
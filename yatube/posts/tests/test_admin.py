@@ -0,0 +1,78 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import EstimatedCountPaginator
+from posts.models import Comment, Group, Post, User
+
+
+class AdminChangeListTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='boss', email='boss@example.com', password='pass')
+        cls.groups = [Group.objects.create(
+            title=f'Группа {i}', slug=f'group-{i}', description='Описание')
+            for i in range(3)]
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def changelist_queries(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def add_rows(self, number):
+        for i in range(number):
+            post = Post.objects.create(
+                author=self.admin, group=self.groups[i % 3], text=f'{i}')
+            Comment.objects.create(post=post, author=self.admin, text='Да')
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк на странице."""
+        for name in ('admin:posts_post_changelist',
+                     'admin:posts_comment_changelist'):
+            with self.subTest(changelist=name):
+                self.add_rows(2)
+                few = self.changelist_queries(name)
+                self.add_rows(20)
+                self.assertEqual(self.changelist_queries(name), few)
+
+    def test_comment_search_by_author(self):
+        """Комментарии ищутся по имени автора."""
+        self.add_rows(1)
+        response = self.admin_client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'boss'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=3)
+    def test_estimated_count(self):
+        """Сверх порога строки не пересчитываются, а оцениваются."""
+        self.add_rows(2)
+        self.assertEqual(
+            EstimatedCountPaginator(Post.objects.all(), 10).count, 2)
+        self.add_rows(5)
+        last = Post.objects.latest('pk').pk
+        self.assertEqual(
+            EstimatedCountPaginator(Post.objects.all(), 10).count, last)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=3)
+    def test_filtered_count_is_capped_not_estimated(self):
+        """Отфильтрованный список не берёт оценку по всей таблице."""
+        self.add_rows(12)
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(group=self.groups[0]), 10)
+        self.assertEqual(paginator.count, 4)
+        self.assertTrue(paginator.capped)
+        response = self.admin_client.get(
+            reverse('admin:posts_post_changelist'),
+            {'group__id__exact': self.groups[0].pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 4)
+        self.assertContains(response, 'больше 3')
@@ -0,0 +1,86 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(title='test_group',
+                                         slug='test_slug',
+                                         description='test_description')
+        cls.posts = [Post.objects.create(author=cls.author, text=f'Пост {i}',
+                                         group=cls.group)
+                     for i in range(15)]
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_json(self, address, data=None):
+        response = self.authorized_client.get(address, data or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_feeds(self):
+        """Все JSON-ленты отдают посты автора от новых к старым."""
+        for address in (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=(self.group.slug,)),
+            reverse('posts:api_profile', args=(self.author.username,)),
+            reverse('posts:api_follow_index'),
+        ):
+            with self.subTest(address=address):
+                data = self.get_json(address)
+                self.assertEqual(
+                    [item['id'] for item in data['results']],
+                    [post.pk for post in self.posts[::-1][:10]])
+                first = data['results'][0]
+                self.assertEqual(first['author'], 'writer')
+                self.assertEqual(first['group'], 'test_slug')
+                self.assertIsNone(first['image'])
+
+    def test_cursor_pagination(self):
+        address = reverse('posts:api_index')
+        first = self.get_json(address)
+        second = self.get_json(address, {'after': first['next']})
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        self.assertEqual(second['results'][0]['id'], self.posts[4].pk)
+
+    def test_field_projection(self):
+        """?fields= оставляет в ответе и в запросе только нужные поля."""
+        address = reverse('posts:api_index')
+        with self.assertNumQueries(4) as context:
+            data = self.get_json(address, {'fields': 'id,text', 'limit': 2})
+        self.assertEqual(data['results'][0],
+                         {'id': self.posts[-1].pk, 'text': 'Пост 14'})
+        self.assertEqual(len(data['results']), 2)
+        page_query = context.captured_queries[-1]['sql']
+        self.assertNotIn('auth_user', page_query)
+        self.assertNotIn('comments_count', page_query)
+
+    def test_bad_parameters(self):
+        address = reverse('posts:api_index')
+        for data in ({'fields': 'id,password'}, {'limit': 0},
+                     {'limit': 'many'}):
+            with self.subTest(data=data):
+                response = self.authorized_client.get(address, data)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_missing_feed_404(self):
+        response = self.authorized_client.get(
+            reverse('posts:api_group_list', args=('missing',)))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,89 @@
+import os
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+
+from benchmarks import concurrency, scenarios, serialization, startup
+from benchmarks.runner import run
+from benchmarks.seed import seed
+
+
+class BenchmarkSmokeTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_route_has_scenario(self):
+        """Для каждого маршрута posts/urls.py есть сценарий замера."""
+        scenarios.check_coverage()
+
+    def test_run_on_small_dataset(self):
+        """Замер проходит все маршруты без ошибочных ответов."""
+        sizes = seed(users=20, posts=60, groups=3, comments=40,
+                     follows_per_user=3, stdout=StringIO())
+        self.assertEqual(sizes['posts'], 60)
+        report = run(requests=2, warmup=1)
+        self.assertEqual(set(report['routes']), set(scenarios.route_names()))
+        for name, result in report['routes'].items():
+            with self.subTest(route=name):
+                self.assertEqual(result['errors'], 0)
+                self.assertEqual(result['requests'], 2)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_serialization_report(self):
+        seed(users=5, posts=20, groups=2, comments=0,
+             follows_per_user=1, stdout=StringIO())
+        report = serialization.run(posts=10, repeat=1)
+        self.assertEqual(report['posts'], 10)
+        self.assertGreater(report['html_render_us'], 0)
+        self.assertGreater(report['json_serialize_us'], 0)
+
+
+class StartupBenchmarkTest(TestCase):
+
+    def test_importtime_summary(self):
+        modules = startup.parse_importtime('\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:   120 |   120 |   django.contrib.admin.sites',
+            'import time:   300 |   420 | django.contrib.admin',
+            'import time:  1500 |  1500 | posts.models',
+        ]))
+        self.assertEqual(modules['posts.models'], 1500)
+        summary = startup.summarize(modules, limit=1)
+        self.assertEqual(list(summary), ['posts', '(прочие)'])
+        self.assertEqual(summary['(прочие)'], {'modules': 2, 'ms': 0.4})
+
+    def test_deferred_submodules_reported(self):
+        """Подмодуль отложенного пакета считается его загрузкой."""
+        self.assertEqual(startup.deferred_loaded({
+            'sorl.thumbnail.admin.current': 1,
+            'sorl.thumbnail.fields': 1,
+            'PILLOW': 1,
+        }), ['sorl.thumbnail.admin'])
+
+    @skipUnless(os.path.exists('/proc/self/smaps_rollup'), 'нужен Linux')
+    def test_preloaded_workers_report(self):
+        """Воркеры поднимаются после fork, PIL и sorl при запуске не грузятся."""
+        report = startup.run(workers=2, modes=('preload',),
+                             path='/about/author/', limit=1000)
+        self.assertEqual(report['imports']['deferred_loaded'], [])
+        self.assertIn('posts', report['imports']['packages'])
+        preload = report['modes']['preload']
+        self.assertEqual(preload['statuses'], [200])
+        self.assertGreater(preload['master_load_ms'], 0)
+        self.assertGreater(preload['worker_shared_mb'], 0)
+
+
+class ConcurrencyBenchmarkSmokeTest(TransactionTestCase):
+
+    def test_profiles_report(self):
+        """Замер с конкурентной записью отчитывается по обоим профилям."""
+        seed(users=10, posts=20, groups=2, comments=10,
+             follows_per_user=2, stdout=StringIO())
+        report = concurrency.run(readers=1, writers=1, duration=0.2)
+        self.assertEqual(set(report['profiles']), set(concurrency.PROFILES))
+        for profile in report['profiles'].values():
+            self.assertGreater(profile['reads']['requests'], 0)
+            self.assertIn('p95_ms', profile['writes'])
@@ -1,26 +1,26 @@
 
 from django.core.cache import cache
+from django.db import transaction
 
-from django.test import Client, TestCase
+from django.test import Client, TransactionTestCase
 from django.urls import reverse
 
 
+from posts import feed_cache
 from posts.models import Post, User
 
 
-class TaskURLTests(TestCase):
+class TaskURLTests(TransactionTestCase):
+    # Ленты сбрасываются после фиксации транзакции (on_commit),
+    # поэтому тесты идут без обёртки TestCase.
 
-    @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
-
-        cls.user = User.objects.create_user(username='User_test')
-        cls.post_cash = Post.objects.create(
-            author=cls.user,
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='User_test')
+        self.post_cash = Post.objects.create(
+            author=self.user,
             text='Тестируем cashe',
         )
-
-    def setUp(self):
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -29,7 +29,7 @@ class TaskURLTests(TestCase):
         """Тестируем  кэш главной страницы."""
         response = self.authorized_client.get(
             reverse('posts:index')).content
-        self.post_cash.delete()
+        Post.objects.filter(pk=self.post_cash.pk).update(text='Без сигнала')
         response_cache = self.authorized_client.get(
             reverse('posts:index')).content
         self.assertEqual(response, response_cache)
@@ -37,3 +37,36 @@ class TaskURLTests(TestCase):
         response_clear = self.authorized_client.get(
             reverse('posts:index')).content
         self.assertNotEqual(response, response_clear)
+
+    def test_cache_invalidated_on_delete(self):
+        """Удаление поста сбрасывает закэшированную главную страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index')).content
+        self.post_cash.delete()
+        response_deleted = self.authorized_client.get(
+            reverse('posts:index')).content
+        self.assertNotEqual(response, response_deleted)
+
+    def test_bump_touches_only_own_namespace(self):
+        """Запись в группу не сбрасывает ленты других групп и авторов."""
+        before = feed_cache.generations('group:1', 'group:2', 'author:1')
+        feed_cache.bump('group:1')
+        after = feed_cache.generations('group:1', 'group:2', 'author:1')
+        self.assertEqual(after[0], before[0] + 1)
+        self.assertEqual(after[1:], before[1:])
+
+    def test_bump_waits_for_commit(self):
+        """Поколение ленты сдвигается только после фиксации транзакции."""
+        before = feed_cache.generations('index')
+        with transaction.atomic():
+            Post.objects.create(author=self.user, text='В транзакции')
+            self.assertEqual(feed_cache.generations('index'), before)
+        self.assertNotEqual(feed_cache.generations('index'), before)
+
+    def test_atomic_view_invalidates_after_commit(self):
+        """Пост из атомарного post_create сразу виден в кэшированной ленте."""
+        self.authorized_client.get(reverse('posts:index'))
+        self.authorized_client.post(reverse('posts:post_create'),
+                                    {'text': 'Из формы'})
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Из формы')
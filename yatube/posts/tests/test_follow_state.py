@@ -0,0 +1,59 @@
+from django.contrib.auth.models import AnonymousUser
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+
+from posts.follow_state import get_follow_state
+from posts.models import Follow, Post, User
+
+
+class FollowStateTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='fan')
+        cls.authors = [User.objects.create_user(username=f'star{i}')
+                       for i in range(5)]
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.user, author=author)
+        cls.posts = [Post.objects.create(author=author, text='Пост')
+                     for author in cls.authors]
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+
+    def test_single_query_for_many_authors(self):
+        """Подписки на N авторов загружаются одним запросом."""
+        state = get_follow_state(self.request(self.user))
+        with self.assertNumQueries(1):
+            state.load([author.pk for author in self.authors])
+            answers = [state.is_following(author.pk)
+                       for author in self.authors]
+        self.assertEqual(answers, [True, True, False, False, False])
+
+    def test_state_cached_on_request(self):
+        """Повторные вопросы в том же запросе не ходят в базу."""
+        request = self.request(self.user)
+        get_follow_state(request).is_following(self.authors[0].pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                get_follow_state(request).is_following(self.authors[0].pk))
+
+    def test_anonymous_without_queries(self):
+        """Для анонимного пользователя запросов нет."""
+        state = get_follow_state(self.request(AnonymousUser()))
+        with self.assertNumQueries(0):
+            self.assertFalse(state.is_following(self.authors[0].pk))
+
+    def test_template_tags(self):
+        """Теги показывают подписки для списка постов за один запрос."""
+        template = Template(
+            '{% load follow_tags %}{% preload_follows posts %}'
+            '{% for post in posts %}{% follows post as on %}'
+            '{{ on|yesno:"1,0" }}{% endfor %}')
+        context = Context({'request': self.request(self.user),
+                           'posts': self.posts})
+        with self.assertNumQueries(1):
+            self.assertEqual(template.render(context), '11000')
@@ -0,0 +1,69 @@
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts import feed_cache
+from posts.models import Follow, User, UserCounter
+
+
+class BulkFollowTest(TransactionTestCase):
+    """Подписки пачками; транзакции настоящие, чтобы сработал on_commit."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='newbie')
+        self.authors = [User.objects.create_user(username=f'author{i}')
+                        for i in range(5)]
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def counters(self, user):
+        return UserCounter.objects.get(user=user)
+
+    def post(self, **data):
+        return self.authorized_client.post(reverse('posts:follow_bulk'), data)
+
+    def test_bulk_follow(self):
+        """Подписка на многих авторов одним запросом."""
+        version = feed_cache.version(f'follow:{self.user.pk}')
+        response = self.post(
+            usernames='author0, author1 author2\nghost newbie')
+        self.assertEqual(response.json(), {
+            'followed': ['author1', 'author2'], 'missing': ['ghost']})
+        self.assertEqual(
+            Follow.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.counters(self.user).following_count, 3)
+        self.assertEqual(self.counters(self.authors[1]).followers_count, 1)
+        self.assertNotEqual(
+            feed_cache.version(f'follow:{self.user.pk}'), version)
+
+    def test_bulk_unfollow(self):
+        """Отписка от многих авторов одним запросом."""
+        response = self.post(username=['author0', 'author3'],
+                             action='unfollow')
+        self.assertEqual(response.json(), {
+            'unfollowed': ['author0'], 'missing': []})
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+        self.assertEqual(self.counters(self.user).following_count, 0)
+        self.assertEqual(self.counters(self.authors[0]).followers_count, 0)
+
+    def test_bulk_follow_requires_post_and_names(self):
+        """Пустой список и GET отклоняются."""
+        self.assertEqual(self.post().status_code, 400)
+        response = self.authorized_client.get(reverse('posts:follow_bulk'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_import_follows(self):
+        """Команда импортирует граф подписок из CSV."""
+        with NamedTemporaryFile('w', suffix='.csv', encoding='utf-8') as csv:
+            csv.write('author1,author2\nauthor3,author2\n'
+                      'newbie,author0\nnobody,author1\n')
+            csv.flush()
+            out, err = StringIO(), StringIO()
+            call_command('import_follows', csv.name, stdout=out, stderr=err)
+        self.assertIn('Добавлено подписок: 2, пропущено: 2', out.getvalue())
+        self.assertIn('nobody', err.getvalue())
+        self.assertEqual(self.counters(self.authors[2]).followers_count, 2)
@@ -1,10 +1,11 @@
+import io
 import shutil
 import tempfile
 from http import HTTPStatus
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.forms import PostForm
@@ -154,3 +155,77 @@ class PostCreateFormTest(TestCase):
         self.assertEqual(comment.author, self.post.author)
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    """Проверки картинки во время загрузки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploader')
+        cls.small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+            b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+            b'\x00\x00\x01\x00\x01\x00\x00\x02'
+            b'\x02\x4c\x01\x00\x3b'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(user=self.user)
+
+    def post_image(self, name, content):
+        return self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'С картинкой',
+            'image': SimpleUploadedFile(name, content, 'image/gif'),
+        })
+
+    def assert_rejected(self, response):
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('image', response.context['form'].errors)
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_BYTES=10)
+    def test_too_large_upload_rejected(self):
+        """Файл больше лимита отклоняется при загрузке."""
+        self.assert_rejected(self.post_image('big.gif', self.small_gif))
+
+    @override_settings(POST_IMAGE_MAX_DIMENSIONS=(1, 1))
+    def test_dimensions_checked_by_header(self):
+        """Размеры картинки проверяются по заголовку."""
+        self.assert_rejected(self.post_image('wide.gif', self.small_gif))
+
+    def test_not_an_image_rejected(self):
+        """Файл без заголовка картинки отклоняется."""
+        self.assert_rejected(self.post_image('fake.gif', b'not an image'))
+
+    def test_jpeg_with_large_icc_profile_accepted(self):
+        """Заголовок JPEG длиннее первой порции дочитывается."""
+        from PIL import Image
+
+        content = io.BytesIO()
+        Image.new('RGB', (800, 600)).save(
+            content, 'JPEG', icc_profile=b'\0' * 150 * 1024)
+        self.assertGreater(len(content.getvalue()),
+                           settings.POST_IMAGE_HEADER_BYTES * 2)
+        response = self.post_image('icc.jpg', content.getvalue())
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+    def test_csrf_still_checked(self):
+        """Замена обработчиков загрузки не отключает проверку CSRF."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(reverse('posts:post_create'), {
+            'text': 'Без токена',
+            'image': SimpleUploadedFile('ok.gif', self.small_gif),
+        })
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.exists())
+
+    def test_valid_image_accepted(self):
+        """Корректная картинка проходит проверки."""
+        response = self.post_image('ok.gif', self.small_gif)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(Post.objects.exclude(image='').exists())
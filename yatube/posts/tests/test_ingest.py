@@ -0,0 +1,94 @@
+from concurrent.futures import Future
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import feed_cache, ingest
+from posts.models import Comment, Post, User
+
+
+@override_settings(COMMENT_BUFFER_ENABLED=True)
+class CommentBufferTest(TransactionTestCase):
+    """Комментарии пишутся фоновым потоком пачками."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='buffered')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def comment(self, text='Комментарий'):
+        return self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': text})
+
+    def test_durable_comment_is_saved_before_redirect(self):
+        """При подтверждении записи комментарий виден сразу после ответа."""
+        response = self.comment()
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertTrue(Comment.objects.filter(
+            post=self.post, author=self.user).exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    @override_settings(COMMENT_BUFFER_DURABLE=False)
+    def test_batch_updates_counter_once(self):
+        """Пачка обновляет счётчик и поколение кэша поста один раз."""
+        version = feed_cache.version(f'post:{self.post.pk}')
+        for i in range(5):
+            self.comment(f'{i} Комментарий')
+        ingest.get_buffer().join()
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 5)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 5)
+        self.assertNotEqual(
+            feed_cache.version(f'post:{self.post.pk}'), version)
+
+    def test_bad_row_does_not_lose_batch(self):
+        """Комментарий к удалённому посту не мешает записи остальных."""
+        good, bad = Future(), Future()
+        ingest.flush([
+            (Comment(post_id=self.post.pk, author=self.user, text='Да'),
+             good),
+            (Comment(post_id=self.post.pk + 100, author=self.user,
+                     text='Нет'), bad),
+        ])
+        self.assertEqual(good.result().text, 'Да')
+        self.assertIsInstance(bad.exception(), DatabaseError)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_invalid_comment_renders_post(self):
+        """Пустой комментарий возвращает страницу поста с ошибкой формы."""
+        response = self.comment('')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'posts/post_detail.html')
+        self.assertTrue(response.context['form'].errors)
+        self.assertFalse(Comment.objects.exists())
+
+    @override_settings(COMMENT_BUFFER_TIMEOUT=0.01)
+    def test_slow_batch_counts_as_accepted(self):
+        """Не дождавшись записи, запрос всё равно переходит к посту."""
+        with mock.patch.object(Future, 'result',
+                               side_effect=ingest.FutureTimeout):
+            response = self.comment()
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}))
+        ingest.get_buffer().join()
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 1)
+
+    def test_database_error_shows_form_error(self):
+        """Сбой записи пачки возвращает форму с ошибкой вместо 500."""
+        with mock.patch.object(ingest, 'flush',
+                               side_effect=DatabaseError('сбой')):
+            response = self.comment('Не записан')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'posts/post_detail.html')
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.assertContains(response, 'Не удалось сохранить комментарий')
+        self.assertFalse(Comment.objects.exists())
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+
+from posts.models import Group, Post, User
+
+TEMPLATE = Template(
+    '{% load post_tags %}{% post_cards posts as cards %}'
+    '{% for card in cards %}{{ card }}{% endfor %}')
+
+
+class PostCardsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [Post.objects.create(
+            author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, **context):
+        posts = Post.objects.select_related('author', 'group').order_by('pk')
+        return TEMPLATE.render(Context(dict(context, posts=posts)))
+
+    def test_cards_rendered_once(self):
+        """Повторный показ берёт карточки из кэша одним get_many."""
+        first = self.render()
+        Post.objects.filter(pk=self.posts[0].pk).update(text='Скрыто')
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as get_many, \
+                mock.patch.object(cache, 'set_many') as set_many:
+            self.assertEqual(self.render(), first)
+        get_many.assert_called_once()
+        set_many.assert_not_called()
+
+    def test_edit_changes_version(self):
+        """Правка поста меняет ключ, и карточка отрисовывается заново."""
+        self.render()
+        post = Post.objects.get(pk=self.posts[0].pk)
+        post.text = 'Новый текст'
+        post.save()
+        html = self.render()
+        self.assertIn('Новый текст', html)
+        self.assertIn('Пост 1', html)
+
+    def test_group_page_variant(self):
+        """На странице группы карточка без ссылки на группу."""
+        self.assertIn('все записи группы', self.render())
+        self.assertNotIn('все записи группы', self.render(group=self.group))
+
+    def test_author_and_group_changes_change_key(self):
+        """Смена имени автора или slug группы не оставляет старых ссылок."""
+        self.render()
+        self.user.username = 'renamed'
+        self.user.save()
+        self.group.slug = 'moved'
+        self.group.save()
+        html = self.render()
+        self.assertIn('/profile/renamed/', html)
+        self.assertIn('/group/moved/', html)
+        self.assertNotIn('/profile/auth/', html)
+
+    def test_profile_variant_without_author_line(self):
+        """На странице автора карточка без строки автора."""
+        html = Template(
+            '{% load post_tags %}{% post_cards posts profile=True as cards %}'
+            '{% for card in cards %}{{ card }}{% endfor %}').render(
+                Context({'posts': Post.objects.select_related(
+                    'author', 'group')}))
+        self.assertNotIn('все посты пользователя', html)
+        self.assertEqual(html.count('<article>'), 3)
+        self.assertIn('все посты пользователя', self.render())
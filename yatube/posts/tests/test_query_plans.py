@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+FULL_SCAN = 'SCAN'
+TEMP_SORT = 'USE TEMP B-TREE'
+
+# Лента подписок без заранее собранных лент сливает посты нескольких
+# авторов, поэтому сортировка в ней неизбежна; путь через timelines
+# проверяется отдельно и сортировки не содержит.
+ALLOWED_TEMP_SORT = {
+    'posts:follow_index': 'USE TEMP B-TREE FOR ORDER BY',
+}
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN для запросов каждой страницы постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='planner')
+        cls.author = User.objects.create_user(username='planned')
+        cls.group = Group.objects.create(
+            title='Планы', slug='plans', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост')
+        Comment.objects.create(post=cls.post, author=cls.user, text='Да')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.pages = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', args=(cls.group.slug,)),
+            'posts:profile': reverse(
+                'posts:profile', args=(cls.author.username,)),
+            'posts:post_detail': reverse(
+                'posts:post_detail', args=(cls.post.pk,)),
+            'posts:post_comments': reverse(
+                'posts:post_comments', args=(cls.post.pk,)),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_uses_indexes(self, name, address):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(address)
+        selects = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        for sql in selects:
+            for step in self.explain(sql):
+                with self.subTest(page=name, step=step, sql=sql[:120]):
+                    if step.startswith(FULL_SCAN):
+                        self.assertIn(' USING ', step,
+                                      'Полный просмотр таблицы')
+                    if step.startswith(TEMP_SORT):
+                        self.assertEqual(step, ALLOWED_TEMP_SORT.get(name),
+                                         'Сортировка во временном B-дереве')
+
+    def test_pages_use_indexes(self):
+        """Запросы страниц идут по индексам и без временной сортировки."""
+        for name, address in self.pages.items():
+            self.assert_uses_indexes(name, address)
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_pages_use_indexes(self):
+        """Курсорный режим тоже обходится индексами."""
+        for name, address in self.pages.items():
+            self.assert_uses_indexes(name, address)
+
+    @override_settings(FOLLOW_TIMELINE_ENABLED=True)
+    def test_timeline_follow_feed_has_no_sort(self):
+        """Собранная лента подписок читается без временной сортировки."""
+        self.authorized_client.get(self.pages['posts:follow_index'])
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(self.pages['posts:follow_index'])
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                for step in self.explain(query['sql']):
+                    self.assertFalse(step.startswith(TEMP_SORT), step)
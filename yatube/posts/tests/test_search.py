@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='searcher')
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Кот спит на диване')
+        cls.often = Post.objects.create(
+            author=cls.user, text='Кот, кот и ещё раз кот')
+        Post.objects.create(author=cls.user, text='Собака гуляет')
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_results_ranked_by_bm25(self):
+        """Пост с большим числом совпадений выше в выдаче."""
+        self.assertEqual(self.search('кот'), [self.often, self.rare])
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(pk=self.rare.pk)
+        post.text = 'Теперь про попугая'
+        post.save()
+        self.assertEqual(self.search('попуга'), [post])
+        self.assertEqual(self.search('диване'), [])
+        Post.objects.filter(pk=self.often.pk).delete()
+        self.assertEqual(self.search('кот'), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Спецсимволы FTS5 в запросе не ломают поиск."""
+        self.assertEqual(self.search('"кот" (спит*'), [self.rare])
+
+    def test_rebuild_search_index(self):
+        """Команда перестраивает индекс пачками."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_post_fts')
+        self.assertEqual(self.search('собака'), [])
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+        self.assertEqual(len(self.search('собака')), 1)
+
+    @override_settings(POSTS_PAGINATION='cursor', POSTS_PER_PAGE=1,
+                       POSTS_SEARCH_BACKEND='posts.search.SimpleSearchBackend')
+    def test_cursor_links_keep_query(self):
+        """Ссылки курсорной пагинации сохраняют строку поиска."""
+        for text in ('cat one', 'cat two'):
+            Post.objects.create(author=self.user, text=text)
+        response = self.client.get(reverse('posts:search'), {'q': 'cat'})
+        next_link = response.context['page_obj'].next_cursor
+        self.assertContains(response, '?q=cat&amp;after=')
+        second = self.client.get(
+            reverse('posts:search'), {'q': 'cat', 'after': next_link})
+        self.assertEqual(len(second.context['page_obj']), 1)
+        self.assertContains(second, '?q=cat&amp;before=')
+        self.assertContains(second, 'href="?q=cat"')
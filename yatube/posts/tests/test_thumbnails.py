@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.forms import PostForm
+from posts.models import Post, User
+from posts.thumbnails import generate
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='painter')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_generate_writes_manifest(self):
+        """Построенное превью попадает в манифест поста."""
+        post = Post.objects.create(
+            author=self.user, text='С картинкой',
+            image=SimpleUploadedFile('thumb.gif', SMALL_GIF, 'image/gif'))
+        self.assertEqual(post.thumbnail_url, '')
+        generate(post.pk)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_url.startswith(settings.MEDIA_URL))
+
+    def test_new_image_resets_manifest(self):
+        """Новая картинка сбрасывает манифест старых превью."""
+        post = Post.objects.create(
+            author=self.user, text='Текст', thumbnails='{"card": "/old.jpg"}')
+        form = PostForm(
+            data={'text': 'Текст'},
+            files={'image': SimpleUploadedFile(
+                'new.gif', SMALL_GIF, 'image/gif')},
+            instance=post)
+        self.assertTrue(form.is_valid())
+        form.save()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnails, '')
+
+    def test_missing_thumbnail_uses_placeholder(self):
+        """Пока превью не готово, вместо оригинала показывается заглушка."""
+        post = Post.objects.create(
+            author=self.user, text='Без превью',
+            image=SimpleUploadedFile('full.gif', SMALL_GIF, 'image/gif'))
+        for url in (reverse('posts:index'),
+                    reverse('posts:post_detail', args=(post.pk,))):
+            with self.subTest(url=url):
+                content = self.client.get(url).content.decode()
+                self.assertIn('img/thumbnail-placeholder.svg', content)
+                self.assertNotIn(post.image.url, content)
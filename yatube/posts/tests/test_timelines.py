@@ -0,0 +1,103 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import timelines
+from posts.models import Follow, Post, User
+
+
+@override_settings(FOLLOW_TIMELINE_ENABLED=True)
+class TimelineTests(TransactionTestCase):
+    """Ленты обновляются после фиксации, поэтому транзакции настоящие."""
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='writer')
+        self.old_post = Post.objects.create(author=self.author, text='Старый')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def get_feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_follow_backfills_and_create_pushes(self):
+        """Подписка дополняет ленту, новый пост попадает в неё сразу."""
+        self.assertEqual(self.get_feed(), [])
+        self.reader_client.get(reverse(
+            'posts:profile_follow', args=(self.author.username,)))
+        self.assertEqual(self.get_feed(), ['Старый'])
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый'})
+        self.assertEqual(self.get_feed(), ['Новый', 'Старый'])
+
+    def test_unfollow_prunes_timeline(self):
+        """После отписки посты автора пропадают из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.get_feed(), ['Старый'])
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', args=(self.author.username,)))
+        self.assertEqual(self.get_feed(), [])
+
+    @override_settings(FOLLOW_TIMELINE_CELEBRITY_FOLLOWERS=1)
+    def test_celebrity_posts_merged_on_read(self):
+        """Посты знаменитостей не раскладываются, а читаются при выдаче."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.get_feed(), ['Старый'])
+        self.assertEqual(cache.get(timelines._key(self.reader.pk)), [])
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый'})
+        self.assertEqual(cache.get(timelines._key(self.reader.pk)), [])
+        self.assertEqual(self.get_feed(), ['Новый', 'Старый'])
+
+    def test_push_waits_for_commit(self):
+        """Пост попадает в ленты только после фиксации транзакции."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.get_feed(), ['Старый'])
+        with transaction.atomic():
+            post = Post.objects.create(author=self.author, text='Новый')
+            timelines.push_post(post)
+            self.assertEqual(
+                len(cache.get(timelines._key(self.reader.pk))), 1)
+        self.assertEqual(self.get_feed(), ['Новый', 'Старый'])
+
+    @override_settings(FOLLOW_TIMELINE_LOCK_TIMEOUT=0.05)
+    def test_busy_timeline_is_dropped_not_overwritten(self):
+        """Не дождавшись блокировки, запись сбрасывает ленту целиком."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.get_feed()
+        cache.add(timelines._lock_key(self.reader.pk), 1)
+        timelines.push_post(
+            Post.objects.create(author=self.author, text='Новый'))
+        self.assertIsNone(cache.get(timelines._key(self.reader.pk)))
+        cache.delete(timelines._lock_key(self.reader.pk))
+        self.assertEqual(self.get_feed(), ['Новый', 'Старый'])
+
+    @override_settings(FOLLOW_TIMELINE_LOCK_TIMEOUT=5)
+    def test_read_does_not_wait_for_lock(self):
+        """Чтение при занятой блокировке не ждёт и ленту не сохраняет."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.add(timelines._lock_key(self.reader.pk), 1)
+        started = time.monotonic()
+        self.assertEqual(self.get_feed(), ['Старый'])
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIsNone(cache.get(timelines._key(self.reader.pk)))
+
+    @override_settings(FOLLOW_TIMELINE_CELEBRITY_FOLLOWERS=2)
+    def test_posts_kept_when_author_stops_being_celebrity(self):
+        """После отписки ниже порога посты знаменитости остаются в ленте."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Знаменитый'})
+        self.assertEqual(self.get_feed(), ['Знаменитый', 'Старый'])
+        Follow.objects.get(user=other).delete()
+        self.assertFalse(timelines.is_celebrity(self.author.pk))
+        self.assertEqual(self.get_feed(), ['Знаменитый', 'Старый'])
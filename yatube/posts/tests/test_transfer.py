@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.transfer import CHECKPOINT, Importer
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.author = User.objects.create_user(username='writer')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.posts = [Post.objects.create(
+            author=self.author, group=self.group, text=f'Пост {i}')
+            for i in range(5)]
+        self.picture = Post.objects.create(
+            author=self.author, text='С картинкой',
+            image=SimpleUploadedFile('pic.gif', SMALL_GIF, 'image/gif'))
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.reader, text='Ок')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def export(self):
+        call_command('export_yatube', self.directory, chunk_size=2,
+                     stdout=StringIO())
+
+    def wipe(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def assert_restored(self):
+        author = User.objects.get(username='writer')
+        self.assertEqual(author.posts.count(), 6)
+        self.assertEqual(author.counters.posts_count, 6)
+        self.assertEqual(author.counters.followers_count, 1)
+        self.assertEqual(Post.objects.filter(group__slug='group').count(), 5)
+        self.assertEqual(Comment.objects.filter(
+            author__username='reader', post__author=author).count(), 5)
+        self.assertEqual(Follow.objects.count(), 1)
+        picture = Post.objects.get(text='С картинкой')
+        with picture.image.open('rb') as image:
+            self.assertEqual(image.read(), SMALL_GIF)
+
+    def test_export_writes_ndjson_and_images(self):
+        self.export()
+        with open(os.path.join(self.directory, 'posts.ndjson'),
+                  encoding='utf-8') as source:
+            rows = [json.loads(line) for line in source]
+        self.assertEqual(len(rows), 6)
+        digest = rows[-1]['image_sha256']
+        self.assertTrue(os.path.exists(os.path.join(
+            self.directory, 'images', digest[:2], digest + '.gif')))
+
+    def test_round_trip(self):
+        """Выгрузка загружается в пустую базу со всеми связями."""
+        self.export()
+        self.wipe()
+        call_command('import_yatube', self.directory, batch_size=2,
+                     stdout=StringIO())
+        self.assert_restored()
+
+    def test_existing_rows_are_matched_and_offset(self):
+        """Пользователи и группы берутся существующие, id постов сдвигаются."""
+        self.export()
+        call_command('import_yatube', self.directory, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 12)
+        last = self.picture.pk
+        copies = Post.objects.filter(pk__gt=last)
+        self.assertEqual(
+            Comment.objects.filter(post__in=copies).count(), 5)
+
+    def test_resume_after_crash(self):
+        """Повторный запуск продолжает с контрольной точки без дублей."""
+        self.export()
+        self.wipe()
+        calls = []
+        original = Importer._comments
+
+        def crash_on_second_batch(importer, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            original(importer, batch)
+
+        with mock.patch.object(Importer, '_comments',
+                               crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                call_command('import_yatube', self.directory, batch_size=2,
+                             stdout=StringIO())
+        with open(os.path.join(self.directory, CHECKPOINT)) as source:
+            self.assertEqual(json.load(source)['done']['comments'], 2)
+        call_command('import_yatube', self.directory, batch_size=2,
+                     stdout=StringIO())
+        self.assert_restored()
+
+    def test_replayed_batch_is_absorbed(self):
+        """Пачка, записанная до сохранения контрольной точки, не дублируется."""
+        self.export()
+        self.wipe()
+        call_command('import_yatube', self.directory, batch_size=2,
+                     stdout=StringIO())
+        path = os.path.join(self.directory, CHECKPOINT)
+        with open(path) as source:
+            state = json.load(source)
+        state['done'].update(posts=4, comments=4)
+        state['finished'] = False
+        with open(path, 'w') as out:
+            json.dump(state, out)
+        call_command('import_yatube', self.directory, batch_size=2,
+                     stdout=StringIO())
+        self.assert_restored()
+
+    def test_taken_ids_stop_import(self):
+        """Занятый во время загрузки id останавливает её, а не теряет пост."""
+        self.export()
+        offset = self.picture.pk
+        with open(os.path.join(self.directory, CHECKPOINT), 'w') as out:
+            json.dump({'post_offset': offset,
+                       'comment_offset': Comment.objects.count(),
+                       'done': {}}, out)
+        Post.objects.create(id=offset + self.posts[1].pk,
+                            author=self.reader, text='С сайта')
+        with self.assertRaises(CommandError):
+            call_command('import_yatube', self.directory, batch_size=2,
+                         stdout=StringIO())
+        with open(os.path.join(self.directory, CHECKPOINT)) as source:
+            self.assertEqual(json.load(source)['done'].get('posts', 0), 0)
+        self.assertFalse(Post.objects.filter(
+            pk=offset + self.posts[0].pk).exists())
@@ -1,10 +1,17 @@
+from datetime import timedelta
+
 from django import forms
 from django.conf import settings
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
+from core.middleware import QueryBudgetExceeded
+from core.testing import QueryBudgetTestMixin
 from posts.forms import PostForm
-from posts.models import Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import encode_cursor
 
 SECOND_PAGE_PAGINATOR = 3
 
@@ -172,3 +179,282 @@ class PiginatorViewsTest(TestCase):
                     self.templates2[number_of_posts_on_next_page])
                 self.assertEqual(len(response.context['page_obj']),
                                  SECOND_PAGE_PAGINATOR)
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_paginator(self):
+        """Курсорный режим листает ленты по ?after= и ?before=."""
+        for address in self.templates:
+            with self.subTest(address=address):
+                first_page = self.authorized_client.get(
+                    address).context['page_obj']
+                self.assertEqual(len(first_page), settings.POSTS_PER_PAGE)
+                self.assertFalse(first_page.has_previous())
+                second_page = self.authorized_client.get(
+                    address, {'after': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second_page), SECOND_PAGE_PAGINATOR)
+                self.assertFalse(second_page.has_next())
+                back_page = self.authorized_client.get(
+                    address, {'before': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back_page), list(first_page))
+                self.assertFalse(back_page.has_previous())
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_stale_cursor_gives_empty_page(self):
+        """Курсор за пределами ленты даёт пустую страницу, а не ошибку."""
+        now = timezone.now()
+        stale = {
+            'after': encode_cursor(now - timedelta(days=365), 1),
+            'before': encode_cursor(now + timedelta(days=365), 10 ** 9),
+        }
+        for address in self.templates:
+            for key, token in stale.items():
+                with self.subTest(address=address, key=key):
+                    response = self.authorized_client.get(
+                        address, {key: token})
+                    self.assertEqual(response.status_code, 200)
+                    page = response.context['page_obj']
+                    self.assertEqual(len(page), 0)
+                    self.assertIsNone(page.next_cursor)
+                    self.assertIsNone(page.previous_cursor)
+
+
+@override_settings(COMMENTS_PER_PAGE=5)
+class CommentsPaginationTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='talker')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'{i} Comment')
+            for i in range(8))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_comments_inline(self):
+        """Под постом сразу выводится первая порция комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 5)
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.id}))
+
+    def test_more_comments_fragment(self):
+        """Остальные комментарии отдаются фрагментом по курсору."""
+        first = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+            {'after': first.next_cursor})
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 3)
+        self.assertFalse(comments.has_next())
+        self.assertFalse(set(comments) & set(first))
+
+    def test_fragment_for_missing_post(self):
+        """Для несуществующего поста фрагмент отвечает 404."""
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(title='test_group',
+                                         slug='test_slug',
+                                         description='test_description')
+        for i in range(settings.POSTS_PER_PAGE + 3):
+            cls.post = Post.objects.create(author=cls.author,
+                                           text=f'{i} Text',
+                                           group=cls.group)
+            Comment.objects.create(post=cls.post, author=cls.user,
+                                   text=f'{i} Comment')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+            reverse('posts:post_comments', kwargs={'post_id': cls.post.id}),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=Text',
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=(cls.group.slug,)),
+            reverse('posts:api_profile', args=(cls.author.username,)),
+            reverse('posts:api_follow_index'),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_pages_within_query_budget(self):
+        """Страницы укладываются в бюджет запросов."""
+        for address in self.pages:
+            with self.subTest(address=address):
+                self.assertWithinQueryBudget(self.authorized_client, address)
+
+    def test_server_timing_header(self):
+        """Число и время запросов отдаются в заголовке Server-Timing."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;dur=\d+\.\d;desc="\d+ queries"$')
+
+    @override_settings(QUERY_BUDGET_STRICT=True,
+                       QUERY_BUDGETS={'posts:index': 0})
+    def test_strict_budget_raises(self):
+        """В строгом режиме превышение бюджета - ошибка."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.authorized_client.get(reverse('posts:index'))
+
+
+class QueryCountTests(QueryBudgetTestMixin, TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(title='test_group',
+                                         slug='test_slug',
+                                         description='test_description')
+        cls.post = cls.add_post(0)
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+            reverse('posts:post_comments', kwargs={'post_id': cls.post.id}),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=Text',
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=(cls.group.slug,)),
+            reverse('posts:api_profile', args=(cls.author.username,)),
+            reverse('posts:api_follow_index'),
+        ]
+
+    @classmethod
+    def add_post(cls, number):
+        post = Post.objects.create(author=cls.author, text=f'{number} Text',
+                                   group=cls.group)
+        Comment.objects.create(post=post, author=cls.user,
+                               text=f'{number} Comment')
+        return post
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def count_queries(self):
+        counts = {}
+        for address in self.pages:
+            cache.clear()
+            response, executed = self.captureQueries(
+                self.authorized_client, address)
+            self.assertEqual(response.status_code, 200)
+            counts[address] = len(executed)
+        return counts
+
+    def test_query_count_does_not_depend_on_posts(self):
+        """Число запросов страниц не зависит от числа постов на них."""
+        before = self.count_queries()
+        for number in range(1, settings.POSTS_PER_PAGE + 3):
+            self.add_post(number)
+            Comment.objects.create(post=self.post, author=self.author,
+                                   text=f'{number} Reply')
+        after = self.count_queries()
+        for address in self.pages:
+            with self.subTest(address=address):
+                self.assertEqual(after[address], before[address])
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(title='test_group',
+                                         slug='test_slug',
+                                         description='test_description')
+        cls.post = Post.objects.create(author=cls.author, text='Text',
+                                       group=cls.group)
+        cls.pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, address):
+        etag = self.authorized_client.get(address)['ETag']
+        return self.authorized_client.get(address, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_not_modified(self):
+        """Неизменная страница отдаётся ответом 304 без тела."""
+        for address in self.pages:
+            with self.subTest(address=address):
+                response = self.revalidate(address)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag лент автора, группы и главной."""
+        etags = [self.authorized_client.get(address)['ETag']
+                 for address in self.pages[:3]]
+        Post.objects.create(author=self.author, text='New',
+                            group=self.group)
+        for address, etag in zip(self.pages, etags):
+            with self.subTest(address=address):
+                response = self.authorized_client.get(
+                    address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_post_etag(self):
+        address = self.pages[3]
+        etag = self.authorized_client.get(address)['ETag']
+        Comment.objects.create(post=self.post, author=self.user, text='Hi')
+        response = self.authorized_client.get(
+            address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Гость не получает 304 по ETag страницы другого пользователя."""
+        etag = self.authorized_client.get(self.pages[0])['ETag']
+        response = Client().get(self.pages[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_objects_still_404(self):
+        for address in (
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+        ):
+            with self.subTest(address=address):
+                self.assertEqual(
+                    self.authorized_client.get(address).status_code, 404)
@@ -0,0 +1,68 @@
+"""Фоновая подготовка превью для картинок постов.
+
+Превью строятся в пуле потоков сразу после сохранения поста, а их URL
+записываются в манифест Post.thumbnails. Шаблоны берут готовый URL и не
+обращаются к хранилищу sorl-thumbnail при каждом показе; пока превью нет,
+показывается лёгкая заглушка, а не исходный файл.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import feed_cache
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_THUMBNAILS_WORKERS,
+                thread_name_prefix='thumbnails')
+        return _executor
+
+
+def generate(post_id):
+    """Строит все превью поста и сохраняет их URL в манифест."""
+    from sorl.thumbnail import get_thumbnail
+
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'image', 'author_id', 'group_id').first()
+    if post is None or not post.image:
+        return
+    manifest = {
+        alias: get_thumbnail(post.image, geometry, **options).url
+        for alias, (geometry, options) in settings.POST_THUMBNAILS.items()
+    }
+    updated = Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        thumbnails=json.dumps(manifest), updated=timezone.now())
+    if updated:
+        feed_cache.bump(*feed_cache.post_namespaces(post))
+
+
+def _run(post_id):
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить превью поста %s', post_id)
+    finally:
+        connection.close()
+
+
+def schedule(post_id):
+    """Ставит построение превью в очередь после фиксации транзакции."""
+    if settings.POST_THUMBNAILS_ASYNC:
+        transaction.on_commit(lambda: _get_executor().submit(_run, post_id))
+    else:
+        transaction.on_commit(lambda: generate(post_id))
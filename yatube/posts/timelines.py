@@ -0,0 +1,221 @@
+"""Ленты подписок, собранные заранее при публикации (fan-out on write).
+
+Для каждого подписчика в кэше хранится ограниченный список записей
+(timestamp, post_id, author_id), отсортированный от новых к старым.
+Посты авторов с числом подписчиков выше порога в ленты не раскладываются
+и подмешиваются при чтении (fan-out on read). Когда автор пересекает
+порог, ленты его подписчиков сбрасываются и собираются заново.
+
+Чтение-изменение-запись ленты идёт под блокировкой в кэше (cache.add),
+чтобы параллельные публикации и сборка не теряли записи друг друга.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Follow, Post, UserCounter
+
+
+def is_enabled():
+    return settings.FOLLOW_TIMELINE_ENABLED
+
+
+def _cache():
+    return caches[settings.FOLLOW_TIMELINE_CACHE]
+
+
+def _key(user_id):
+    return f'timeline:{user_id}'
+
+
+def _entries(queryset):
+    """Переводит посты в записи ленты одним запросом."""
+    rows = queryset.order_by('-pub_date', '-pk').values_list(
+        'pub_date', 'pk', 'author_id')[:settings.FOLLOW_TIMELINE_SIZE]
+    return [(pub_date.timestamp(), pk, author_id)
+            for pub_date, pk, author_id in rows]
+
+
+def _merge(*sources):
+    """Сливает записи без дублей и обрезает до размера ленты."""
+    merged = {}
+    for entries in sources:
+        for entry in entries:
+            merged[entry[1]] = entry
+    entries = sorted(merged.values(), reverse=True)
+    return entries[:settings.FOLLOW_TIMELINE_SIZE]
+
+
+def _store(timelines):
+    _cache().set_many(
+        {_key(user_id): entries for user_id, entries in timelines.items()},
+        settings.FOLLOW_TIMELINE_TIMEOUT)
+
+
+def _lock_key(user_id):
+    return f'{_key(user_id)}:lock'
+
+
+def _acquire(user_id, wait=True):
+    """Берёт блокировку ленты; False, если она занята и не дождались.
+
+    Без wait делается одна попытка: чтение не должно ждать публикацию.
+    """
+    timeout = settings.FOLLOW_TIMELINE_LOCK_TIMEOUT
+    deadline = time.monotonic() + timeout
+    while not _cache().add(_lock_key(user_id), 1, timeout):
+        if not wait or time.monotonic() >= deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def _release(user_id):
+    _cache().delete(_lock_key(user_id))
+
+
+def _update(user_id, change):
+    """Меняет собранную ленту: change(записи) -> новые записи."""
+    if not _acquire(user_id):
+        # Блокировку не дождались: лента соберётся заново при чтении.
+        _cache().delete(_key(user_id))
+        return
+    try:
+        entries = _cache().get(_key(user_id))
+        if entries is not None:
+            _store({user_id: change(entries)})
+    finally:
+        _release(user_id)
+
+
+def celebrity_ids(user_id):
+    """Авторы из подписок пользователя, чьи посты читаются при выдаче."""
+    return set(
+        UserCounter.objects.filter(
+            user__following__user_id=user_id,
+            followers_count__gte=settings.FOLLOW_TIMELINE_CELEBRITY_FOLLOWERS)
+        .values_list('user_id', flat=True))
+
+
+def is_celebrity(author_id):
+    return UserCounter.objects.filter(
+        user_id=author_id,
+        followers_count__gte=settings.FOLLOW_TIMELINE_CELEBRITY_FOLLOWERS,
+    ).exists()
+
+
+def push_post(post):
+    """После фиксации кладёт пост в собранные ленты подписчиков автора."""
+    if is_enabled():
+        transaction.on_commit(lambda: _push(post))
+
+
+def _push(post):
+    if is_celebrity(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    keys = {_key(user_id): user_id for user_id in follower_ids}
+    if not keys:
+        return
+    entry = (post.pub_date.timestamp(), post.pk, post.author_id)
+    # Блокируются только уже собранные ленты; отсутствующие соберутся
+    # при чтении под той же блокировкой.
+    for key in _cache().get_many(list(keys)):
+        _update(keys[key], lambda entries: _merge(entries, [entry]))
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    if not is_enabled() or is_celebrity(author_id):
+        return
+    posts = _entries(Post.objects.filter(author_id=author_id))
+    _update(user_id, lambda entries: _merge(entries, posts))
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты подписчика посты автора после отписки."""
+    if is_enabled():
+        _update(user_id, lambda entries: [
+            entry for entry in entries if entry[2] != author_id])
+
+
+def invalidate(user_ids):
+    """Сбрасывает ленты подписчиков; они соберутся заново при чтении."""
+    if is_enabled() and user_ids:
+        _cache().delete_many([_key(user_id) for user_id in user_ids])
+
+
+def followers_changed(author_ids, delta):
+    """Сбрасывает после фиксации ленты подписчиков авторов, чьё число
+    подписчиков после изменения на delta пересекло порог знаменитости.
+    """
+    if not is_enabled() or not delta or not author_ids:
+        return
+    threshold = settings.FOLLOW_TIMELINE_CELEBRITY_FOLLOWERS
+    crossed = UserCounter.objects.filter(
+        user_id__in=author_ids,
+        followers_count__gte=threshold + min(delta, 0),
+        followers_count__lt=threshold + max(delta, 0),
+    ).values('user_id')
+    follower_ids = set(Follow.objects.filter(
+        author_id__in=crossed).values_list('user_id', flat=True))
+    if follower_ids:
+        transaction.on_commit(lambda: invalidate(follower_ids))
+
+
+def build(user_id, exclude_authors=()):
+    """Собирает ленту заново, если её нет в кэше.
+
+    Если ленту сейчас меняет публикация, собранные записи отдаются
+    без сохранения.
+    """
+    locked = _acquire(user_id, wait=False)
+    try:
+        entries = _entries(
+            Post.objects.filter(author__in=Follow.objects.filter(
+                user_id=user_id).values('author'))
+            .exclude(author_id__in=exclude_authors))
+        if locked:
+            _store({user_id: entries})
+    finally:
+        if locked:
+            _release(user_id)
+    return entries
+
+
+class TimelineFeed:
+    """Лента подписок как последовательность для Paginator.
+
+    Посты загружаются только для запрошенного среза.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def count(self):
+        return len(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        ids = [pk for _, pk, _ in self.entries[index]]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def feed(user_id):
+    """Лента подписок: собранная заранее часть плюс посты знаменитостей."""
+    celebrities = celebrity_ids(user_id)
+    entries = _cache().get(_key(user_id))
+    if entries is None:
+        entries = build(user_id, exclude_authors=celebrities)
+    if celebrities:
+        entries = _merge(
+            entries, _entries(Post.objects.filter(author_id__in=celebrities)))
+    return TimelineFeed(entries)
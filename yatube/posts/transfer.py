@@ -0,0 +1,291 @@
+"""Выгрузка и загрузка пользователей, групп, постов, комментариев и
+подписок в NDJSON.
+
+Каталог выгрузки:
+
+    users.ndjson, groups.ndjson, posts.ndjson, comments.ndjson,
+    follows.ndjson - по одному объекту JSON в строке;
+    images/<sha256[:2]>/<sha256><расширение> - файлы картинок постов.
+
+Выгрузка читает таблицы через iterator(chunk_size) и пишет строку за
+строкой, поэтому память не зависит от размера таблиц. Загрузка идёт
+пачками bulk_create. Пользователи и группы сопоставляются по username
+и slug. Посты и комментарии получают id со сдвигом за наибольший
+существующий id. После каждой пачки номер строки записывается в
+контрольную точку, и повторный запуск продолжает с неё.
+
+Сдвинутые id не должны заниматься во время загрузки: загружайте в
+базу, куда сайт не пишет. Если id из пачки уже занят, загрузка
+останавливается с ImportConflict; занятой целиком может быть только
+первая пачка после возобновления - её уже записал прерванный запуск.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+from .utils import explicit_dates
+
+TABLES = (
+    ('users', User, ('id', 'username', 'first_name', 'last_name', 'email',
+                     'password', 'is_active', 'date_joined')),
+    ('groups', Group, ('id', 'title', 'slug', 'description')),
+    ('posts', Post, ('id', 'text', 'pub_date', 'updated', 'author_id',
+                     'group_id', 'image')),
+    ('comments', Comment, ('id', 'post_id', 'author_id', 'text', 'created')),
+    ('follows', Follow, ('user_id', 'author_id')),
+)
+IMAGES_DIR = 'images'
+CHECKPOINT = 'import.checkpoint.json'
+COPY_CHUNK = 64 * 1024
+
+
+class ImportConflict(Exception):
+    """Сдвинутые id постов или комментариев уже заняты другими строками."""
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def _image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def image_path(directory, digest, name):
+    extension = os.path.splitext(name)[1].lower()
+    return os.path.join(directory, IMAGES_DIR, digest[:2], digest + extension)
+
+
+def _hash_copy(source, target):
+    """Копирует файл по частям и возвращает sha256 содержимого."""
+    digest = hashlib.sha256()
+    with open(target, 'wb') as out:
+        for chunk in iter(lambda: source.read(COPY_CHUNK), b''):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def _export_image(directory, name):
+    incoming = os.path.join(directory, IMAGES_DIR, 'incoming.tmp')
+    try:
+        with _image_storage().open(name, 'rb') as source:
+            digest = _hash_copy(source, incoming)
+    except FileNotFoundError:
+        return None
+    target = image_path(directory, digest, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(incoming, target)
+    return digest
+
+
+def export(directory, chunk_size=2000):
+    """Выгружает все таблицы в каталог и возвращает число строк."""
+    os.makedirs(os.path.join(directory, IMAGES_DIR), exist_ok=True)
+    counts = {}
+    for name, model, fields in TABLES:
+        path = os.path.join(directory, f'{name}.ndjson')
+        rows = model.objects.order_by('pk').values(*fields).iterator(
+            chunk_size=chunk_size)
+        count = 0
+        with open(path + '.tmp', 'w', encoding='utf-8') as out:
+            for row in rows:
+                if name == 'posts' and row['image']:
+                    row['image_sha256'] = _export_image(
+                        directory, row['image'])
+                out.write(json.dumps(
+                    row, ensure_ascii=False, default=_default) + '\n')
+                count += 1
+        os.replace(path + '.tmp', path)
+        counts[name] = count
+    return counts
+
+
+class Checkpoint:
+    """Состояние загрузки в JSON-файле рядом с выгрузкой."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as source:
+                self.data = json.load(source)
+
+    def save(self):
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as out:
+            json.dump(self.data, out)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def _lines(directory, name, skip=0):
+    with open(os.path.join(directory, f'{name}.ndjson'),
+              encoding='utf-8') as source:
+        for line in islice(source, skip, None):
+            yield json.loads(line)
+
+
+def _batches(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _match_users(batch):
+    names = {row['username'] for row in batch}
+    existing = dict(User.objects.filter(username__in=names)
+                    .values_list('username', 'pk'))
+    missing = [row for row in batch if row['username'] not in existing]
+    if missing:
+        with explicit_dates(User._meta.get_field('date_joined')):
+            User.objects.bulk_create([
+                User(username=row['username'], first_name=row['first_name'],
+                     last_name=row['last_name'], email=row['email'],
+                     password=row['password'], is_active=row['is_active'],
+                     date_joined=parse_datetime(row['date_joined']))
+                for row in missing], ignore_conflicts=True)
+        existing.update(User.objects.filter(
+            username__in=[row['username'] for row in missing])
+            .values_list('username', 'pk'))
+    return {row['id']: existing[row['username']] for row in batch}
+
+
+def _match_groups(batch):
+    for row in batch:
+        Group.objects.get_or_create(slug=row['slug'], defaults={
+            'title': row['title'], 'description': row['description']})
+    existing = dict(Group.objects.filter(
+        slug__in=[row['slug'] for row in batch]).values_list('slug', 'pk'))
+    return {row['id']: existing[row['slug']] for row in batch}
+
+
+def _import_image(directory, row):
+    """Кладёт картинку в хранилище и возвращает её имя."""
+    digest = row.get('image_sha256')
+    if not digest:
+        return ''
+    storage = _image_storage()
+    path = image_path(directory, digest, row['image'])
+    if storage.exists(row['image']):
+        with storage.open(row['image'], 'rb') as current:
+            if _hash_copy(current, os.devnull) == digest:
+                return row['image']
+    with open(path, 'rb') as source:
+        if _hash_copy(source, os.devnull) != digest:
+            raise ValueError(f'Файл {path} не совпадает с sha256')
+        source.seek(0)
+        return storage.save(row['image'], File(source))
+
+
+class Importer:
+    """Загрузка каталога выгрузки с продолжением с контрольной точки."""
+
+    def __init__(self, directory, batch_size=500):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.checkpoint = Checkpoint(os.path.join(directory, CHECKPOINT))
+        self.state = self.checkpoint.data
+        self.users = {}
+        self.groups = {}
+        self.replay = False
+
+    def run(self):
+        """Загружает всё и возвращает число прочитанных строк по файлам."""
+        state = self.state
+        if 'post_offset' not in state:
+            state['post_offset'] = Post.objects.aggregate(
+                last=Max('pk'))['last'] or 0
+            state['comment_offset'] = Comment.objects.aggregate(
+                last=Max('pk'))['last'] or 0
+            state['done'] = {}
+            self.checkpoint.save()
+        # Сопоставление идемпотентно и нужно целиком для внешних ключей.
+        for batch in _batches(_lines(self.directory, 'users'),
+                              self.batch_size):
+            self.users.update(_match_users(batch))
+        for batch in _batches(_lines(self.directory, 'groups'),
+                              self.batch_size):
+            self.groups.update(_match_groups(batch))
+        self._load('posts', self._posts)
+        self._load('comments', self._comments)
+        self._load('follows', self._follows)
+        return dict(state['done'], users=len(self.users),
+                    groups=len(self.groups))
+
+    def _load(self, name, build):
+        done = self.state['done'].get(name, 0)
+        # Сбой между фиксацией пачки и записью контрольной точки
+        # повторяет только первую пачку.
+        self.replay = True
+        for batch in _batches(_lines(self.directory, name, skip=done),
+                              self.batch_size):
+            with transaction.atomic():
+                build(batch)
+            self.replay = False
+            done += len(batch)
+            self.state['done'][name] = done
+            self.checkpoint.save()
+
+    def _insert(self, model, objects):
+        """Вставляет пачку с заранее выбранными id."""
+        ids = [obj.pk for obj in objects]
+        taken = model.objects.filter(pk__in=ids).count()
+        if self.replay and taken == len(ids):
+            return
+        name = model._meta.model_name
+        if taken:
+            raise ImportConflict(
+                f'{name}: {taken} из {len(ids)} id в диапазоне '
+                f'{ids[0]}-{ids[-1]} уже заняты; загрузка требует базы, '
+                f'в которую не пишет сайт')
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(objects)
+        except IntegrityError as error:
+            raise ImportConflict(
+                f'{name}: id в диапазоне {ids[0]}-{ids[-1]} '
+                f'заняты во время загрузки') from error
+
+    def _posts(self, batch):
+        offset = self.state['post_offset']
+        fields = [Post._meta.get_field(name)
+                  for name in ('pub_date', 'updated')]
+        with explicit_dates(*fields):
+            self._insert(Post, [
+                Post(id=row['id'] + offset, text=row['text'],
+                     pub_date=parse_datetime(row['pub_date']),
+                     updated=parse_datetime(row['updated']),
+                     author_id=self.users[row['author_id']],
+                     group_id=self.groups.get(row['group_id']),
+                     image=_import_image(self.directory, row))
+                for row in batch])
+
+    def _comments(self, batch):
+        offset = self.state['comment_offset']
+        post_offset = self.state['post_offset']
+        with explicit_dates(Comment._meta.get_field('created')):
+            self._insert(Comment, [
+                Comment(id=row['id'] + offset,
+                        post_id=row['post_id'] + post_offset,
+                        author_id=self.users[row['author_id']],
+                        text=row['text'],
+                        created=parse_datetime(row['created']))
+                for row in batch])
+
+    def _follows(self, batch):
+        Follow.objects.bulk_create([
+            Follow(user_id=self.users[row['user_id']],
+                   author_id=self.users[row['author_id']])
+            for row in batch
+            if row['user_id'] != row['author_id']], ignore_conflicts=True)
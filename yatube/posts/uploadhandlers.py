@@ -0,0 +1,108 @@
+"""Потоковая загрузка картинок с ранними проверками.
+
+Файл пишется во временный файл по кускам. Размер проверяется на лету,
+а формат и размеры картинки определяются по заголовку без
+декодирования. Заголовок читается с первых POST_IMAGE_HEADER_BYTES;
+если PIL их не хватило (большие EXIF/ICC в JPEG), попытка повторяется
+при удвоении прочитанного и в конце загрузки. Отклонённая загрузка
+дочитывается из запроса без записи на диск, а ошибка передаётся форме
+в upload_error.
+
+Обработчик ставится только на представления с картинками постов
+(image_uploads), остальные загрузки идут обработчиками Django.
+"""
+import io
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл и отклоняет её как можно раньше."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b''
+        self.next_attempt = settings.POST_IMAGE_HEADER_BYTES
+        self.image_info = None
+        self.upload_error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload_error:
+            return None
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            return self.reject(
+                f'Файл больше '
+                f'{filesizeformat(settings.POST_IMAGE_MAX_BYTES)}')
+        if self.image_info is None:
+            self.check_header(raw_data)
+            if self.upload_error:
+                return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.image_info is None and not self.upload_error:
+            self.check_header(b'', final=True)
+        uploaded = super().file_complete(file_size)
+        uploaded.upload_error = self.upload_error
+        uploaded.image_info = self.image_info
+        return uploaded
+
+    def reject(self, message):
+        self.upload_error = message
+        self.file.seek(0)
+        self.file.truncate()
+        return None
+
+    def check_header(self, raw_data, final=False):
+        """Читает формат и размеры по заголовку картинки."""
+        from PIL import Image
+
+        self.header += raw_data
+        if not final and len(self.header) < self.next_attempt:
+            return None
+        try:
+            image = Image.open(io.BytesIO(self.header))
+            image_format, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            return self.reject('Слишком большое изображение')
+        except (OSError, SyntaxError, ValueError):
+            if final:
+                return self.reject(
+                    'Загрузите правильное изображение. Файл, который вы '
+                    'загрузили, поврежден или не является изображением.')
+            self.next_attempt = len(self.header) * 2
+            return None
+        self.header = b''
+        if image_format not in settings.POST_IMAGE_FORMATS:
+            return self.reject(
+                f'Формат {image_format} не поддерживается, загрузите '
+                f'{", ".join(settings.POST_IMAGE_FORMATS)}')
+        max_width, max_height = settings.POST_IMAGE_MAX_DIMENSIONS
+        if width > max_width or height > max_height:
+            return self.reject(
+                f'Изображение больше {max_width}x{max_height} пикселей')
+        self.image_info = (image_format, width, height)
+        return None
+
+
+def image_uploads(view):
+    """Принимает загрузки представления через ImageUploadHandler.
+
+    Обработчики нужно заменить до чтения request.POST, а CsrfViewMiddleware
+    читает его раньше представления, поэтому проверка CSRF переносится
+    внутрь, после замены.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return wrapper
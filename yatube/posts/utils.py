@@ -1,11 +1,155 @@
+import base64
+import binascii
+from contextlib import contextmanager
+
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(value, pk):
+    """Упаковывает ключ (дата, id) в непрозрачный токен для URL."""
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора, для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.split('|')
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Даёт bulk_create сохранить заданные даты вместо auto_now и
+    auto_now_add.
+    """
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class CursorPage:
+    """Страница ленты, выбранная по ключу (дата, id) без COUNT(*)."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, field, has_next, has_previous):
+        self.object_list = object_list
+        self.field = field
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def _cursor(self, obj):
+        if isinstance(obj, dict):
+            return encode_cursor(obj[self.field], obj['pk'])
+        return encode_cursor(getattr(obj, self.field), obj.pk)
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self._cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self._cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (field, id) от новых к старым.
+
+    В отличие от Paginator не считает общее количество строк и не
+    использует OFFSET, поэтому любая страница стоит как первая.
+    """
+
+    def __init__(self, queryset, per_page, field='pub_date'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def get_page(self, after=None, before=None):
+        after = decode_cursor(after)
+        before = None if after else decode_cursor(before)
+        field = self.field
+        if before:
+            value, pk = before
+            queryset = self.queryset.filter(
+                Q(**{f'{field}__gt': value})
+                | Q(**{field: value, 'pk__gt': pk})
+            ).order_by(field, 'pk')
+            rows = list(queryset[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            # Устаревший курсор может указывать за пределы ленты:
+            # пустая страница ссылок дальше не даёт.
+            return CursorPage(rows, field, bool(rows), has_previous)
+        queryset = self.queryset
+        if after:
+            value, pk = after
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': value})
+                | Q(**{field: value, 'pk__lt': pk})
+            )
+        queryset = queryset.order_by(f'-{field}', '-pk')
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], field, has_next,
+                          bool(after and rows))
 
 
 def get_page_pages(queryset, request):
-    paginator = Paginator(queryset, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    """Возвращает страницу ленты в режиме settings.POSTS_PAGINATION."""
+    if (settings.POSTS_PAGINATION == 'cursor'
+            and isinstance(queryset, QuerySet)):
+        paginator = CursorPaginator(queryset, settings.POSTS_PER_PAGE)
+        page_obj = paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'))
+    else:
+        paginator = Paginator(queryset, settings.POSTS_PER_PAGE)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     return{
         'page_obj': page_obj,
     }
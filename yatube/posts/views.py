@@ -1,19 +1,29 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import DatabaseError, transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition, require_POST
 
+from . import (api, conditional, feed_cache, follows, ingest,
+               search as post_search, timelines)
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Comment, Follow
-from .utils import get_page_pages
+from .uploadhandlers import image_uploads
+from .utils import CursorPaginator, get_page_pages
 
 
+@condition(etag_func=conditional.index_etag)
 def index(request):
     """Выводит шаблоны главной страницы."""
     context = get_page_pages(
         Post.objects.select_related('author', 'group'), request)
+    context.update(feed_cache.context('index'))
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=conditional.group_etag)
 def group_posts(request, slug):
     """Выводит шаблон с группами постов."""
     group = get_object_or_404(Group, slug=slug)
@@ -22,38 +32,81 @@ def group_posts(request, slug):
     }
     context.update(get_page_pages(
         group.posts.select_related('author', 'group'), request))
+    context.update(feed_cache.context(f'group:{group.pk}'))
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username):
     """Выводит шаблон профайла пользователя."""
-    author = get_object_or_404(User, username=username)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author).exists()
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username)
     context = {
         'author': author,
-        'following': following,
     }
     context.update(get_page_pages(
-        author.posts.all(), request))
+        author.posts.select_related('group'), request))
+    context.update(feed_cache.context(f'author:{author.pk}'))
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=conditional.post_etag)
 def post_detail(request, post_id):
     """Выводит информацию о посте."""
     form = CommentForm()
-    post = get_object_or_404(Post.objects.select_related("author"), id=post_id)
-    comment = post.comments.all().select_related("author")
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'), id=post_id)
+    return _render_post_detail(request, post, form)
+
+
+def _render_post_detail(request, post, form):
     context = {
         'post': post,
         'form': form,
-        'comment': comment,
+        'comments': _comments_page(post.pk),
     }
+    context.update(feed_cache.context(f'post:{post.pk}'))
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Отдаёт фрагмент со следующей порцией комментариев к посту."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    after = request.GET.get('after', '')
+    context = {
+        'post_id': post_id,
+        'comments': _comments_page(post_id, after),
+        'comments_after': after,
+    }
+    context.update(feed_cache.context(f'post:{post_id}'))
+    return render(request, 'includes/comments.html', context)
+
+
+def _comments_page(post_id, after=None):
+    # Страница выбирается лениво: при попадании в кэш фрагмента
+    # запрос комментариев не выполняется.
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.COMMENTS_PER_PAGE, field='created')
+    return SimpleLazyObject(lambda: paginator.get_page(after=after))
+
+
+def search(request):
+    """Выводит найденные по тексту посты."""
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+    }
+    if query:
+        context.update(get_page_pages(
+            post_search.get_backend().search(query), request))
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@image_uploads
+@transaction.atomic
 def post_create(request):
     """Создания новго поста."""
     form = PostForm(request.POST or None,
@@ -62,6 +115,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         form.save()
+        timelines.push_post(post)
         return redirect('posts:profile', request.user)
     context = {
         'form': form,
@@ -70,6 +124,8 @@ def post_create(request):
 
 
 @login_required
+@image_uploads
+@transaction.atomic
 def post_edit(request, post_id):
     """Редактирование поста."""
     post = get_object_or_404(Post, id=post_id)
@@ -90,47 +146,130 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    """Получение поста."""
-    post = get_object_or_404(Post, id=post_id)
-    post_comments = post.comments.all()
+    """Добавляет комментарий к посту."""
     form = CommentForm(request.POST or None)
-    if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
-        return redirect('posts:post_detail', post_id=post_id)
-    context = {
-        'form': form,
-        'post': post,
-    }
-    return render(request, 'posts:post_detail', context)
+    if not form.is_valid():
+        post = get_object_or_404(
+            Post.objects.select_related('author__counters', 'group'),
+            id=post_id)
+        return _render_post_detail(request, post, form)
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post_id = post_id
+    try:
+        ingest.save_comment(comment)
+    except DatabaseError:
+        form.add_error(
+            None, 'Не удалось сохранить комментарий, попробуйте ещё раз.')
+        post = get_object_or_404(
+            Post.objects.select_related('author__counters', 'group'),
+            id=post_id)
+        return _render_post_detail(request, post, form)
+    return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
     """Информация о текущем пользователе доступа."""
-    post = Post.objects.filter(
-        author__following__user=request.user)
-    page_obj = get_page_pages(post, request)
+    if timelines.is_enabled():
+        post = timelines.feed(request.user.pk)
+    else:
+        post = Post.objects.filter(
+            author__in=Follow.objects.filter(
+                user=request.user).values('author')).select_related(
+                    'author', 'group')
     context = {
         'title': "Посты в подписке",
-        'page_obj': page_obj,
     }
+    context.update(get_page_pages(post, request))
+    context.update(feed_cache.context('index', f'follow:{request.user.pk}'))
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     """Подписаться на автора."""
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        _, created = Follow.objects.get_or_create(
+            user=request.user, author=author)
+        if created:
+            timelines.backfill(request.user.pk, author.pk)
     return redirect("posts:profile", author)
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     """Дизлайк,отписка."""
-    Follow.objects.filter(user=request.user, author__username=username).delete()
+    author = get_object_or_404(User, username=username)
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author=author).delete()
+    if deleted:
+        timelines.prune(request.user.pk, author.pk)
     return redirect("posts:profile", username)
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Подписка или отписка сразу на многих авторов.
+
+    Имена передаются полями username или строкой usernames через
+    пробел, запятую или перевод строки; action=unfollow отписывает.
+    """
+    usernames = set(request.POST.getlist('username'))
+    usernames.update(
+        request.POST.get('usernames', '').replace(',', ' ').split())
+    usernames.discard(request.user.username)
+    if not usernames or len(usernames) > settings.FOLLOW_BULK_MAX:
+        return JsonResponse(
+            {'error': f'Нужно от 1 до {settings.FOLLOW_BULK_MAX} имён.'},
+            status=400)
+    if request.POST.get('action') == 'unfollow':
+        result = follows.unfollow_usernames(request.user, usernames)
+    else:
+        result = follows.follow_usernames(request.user, usernames)
+    return JsonResponse(result)
+
+
+def _api_response(request, queryset):
+    try:
+        fields = api.parse_fields(request.GET.get('fields'))
+        per_page = api.parse_limit(request.GET.get('limit'))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    page = api.get_page(queryset, fields, request.GET.get('after'), per_page)
+    return StreamingHttpResponse(
+        api.stream(page, fields), content_type='application/json')
+
+
+@condition(etag_func=conditional.index_etag)
+def api_index(request):
+    """Главная лента в JSON."""
+    return _api_response(request, Post.objects.all())
+
+
+@condition(etag_func=conditional.group_etag)
+def api_group_posts(request, slug):
+    """Лента группы в JSON."""
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return _api_response(request, Post.objects.filter(group=group))
+
+
+@condition(etag_func=conditional.profile_etag)
+def api_profile(request, username):
+    """Посты автора в JSON."""
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return _api_response(request, Post.objects.filter(author=author))
+
+
+@login_required
+def api_follow_index(request):
+    """Лента подписок в JSON."""
+    return _api_response(request, Post.objects.filter(
+        author__in=Follow.objects.filter(
+            user=request.user).values('author')))
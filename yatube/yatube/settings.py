@@ -37,6 +37,13 @@ ALLOWED_HOSTS = [
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Картинки постов пишутся во временный файл и проверяются по заголовку
+# (posts.uploadhandlers.image_uploads на представлениях постов).
+POST_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+POST_IMAGE_MAX_DIMENSIONS = (4096, 4096)
+POST_IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+# С какого объёма впервые читать заголовок; без успеха объём удваивается.
+POST_IMAGE_HEADER_BYTES = 64 * 1024
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 # Application definition
@@ -50,7 +57,8 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # django.contrib.admin, который не импортирует sorl.thumbnail.admin.
+    'core.apps.AdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -64,6 +72,8 @@ INSTALLED_APPS = [
 ]
 # anfisa/settings.py
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
+    'core.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,8 +83,69 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Наибольшее число запросов к базе на одну страницу, по имени URL.
+# Превышение пишется в лог, а при QUERY_BUDGET_STRICT - ошибка.
+# Для страниц с ETag в бюджет входит запрос валидатора.
+QUERY_BUDGETS = {
+    'posts:index': 5,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 5,
+    'posts:post_comments': 4,
+    'posts:follow_index': 6,
+    'posts:search': 5,
+    'posts:api_index': 4,
+    'posts:api_group_list': 5,
+    'posts:api_profile': 5,
+    'posts:api_follow_index': 3,
+}
+QUERY_BUDGET_STRICT = False
 
 POSTS_PER_PAGE = 10
+# Наибольший ?limit= страницы JSON-лент posts:api_*.
+API_MAX_PER_PAGE = 100
+# Комментарии под постом сразу, остальные подгружаются порциями.
+COMMENTS_PER_PAGE = 20
+# Запись комментариев пачками из фонового потока вместо INSERT в запросе.
+# При COMMENT_BUFFER_DURABLE запрос ждёт фиксации своей пачки не дольше
+# COMMENT_BUFFER_TIMEOUT секунд, иначе отвечает сразу после постановки.
+COMMENT_BUFFER_ENABLED = False
+COMMENT_BUFFER_DURABLE = True
+COMMENT_BUFFER_BATCH_SIZE = 100
+COMMENT_BUFFER_INTERVAL = 0.005
+COMMENT_BUFFER_TIMEOUT = 5
+# 'pages' - нумерованные страницы, 'cursor' - курсоры ?after=/?before=
+POSTS_PAGINATION = 'pages'
+
+# Списки админки считают строки точно только до этого порога,
+# дальше число оценивается по наибольшему id.
+ADMIN_EXACT_COUNT_LIMIT = 10000
+# Наибольшее число авторов в одном запросе posts:follow_bulk.
+FOLLOW_BULK_MAX = 500
+# Ленты подписок, собранные при публикации поста (fan-out on write).
+# Посты авторов, у которых подписчиков не меньше порога,
+# подмешиваются в ленту при чтении.
+FOLLOW_TIMELINE_ENABLED = False
+FOLLOW_TIMELINE_SIZE = 500
+FOLLOW_TIMELINE_CELEBRITY_FOLLOWERS = 1000
+FOLLOW_TIMELINE_CACHE = 'default'
+FOLLOW_TIMELINE_TIMEOUT = 60 * 60 * 24 * 7
+# Сколько секунд ждать и держать блокировку ленты при её изменении.
+FOLLOW_TIMELINE_LOCK_TIMEOUT = 5
+
+# Фрагменты лент сбрасываются сигналами, поэтому TTL может быть долгим
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Превью картинок постов: псевдоним -> (геометрия, опции sorl-thumbnail).
+# Строятся в фоновом пуле потоков после сохранения поста.
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+POST_THUMBNAILS_ASYNC = True
+POST_THUMBNAILS_WORKERS = 2
+
+# Поиск по постам: SQLiteFTSBackend (FTS5, BM25) или SimpleSearchBackend
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
 
 ROOT_URLCONF = 'yatube.urls'
 
@@ -85,6 +156,20 @@ CACHES = {
     }
 }
 
+# Общий кэш для нескольких процессов: redis://host:port/db. Перед ним
+# у каждого процесса свой небольшой кэш на L1_SIZE записей.
+CACHE_REDIS_URL = os.environ.get('YATUBE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'core.cache.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'OPTIONS': {
+            'L1_SIZE': 1000,
+            'L1_TTL': 5.0,
+            'SOCKET_TIMEOUT': 1.0,
+        },
+    }
+
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
@@ -104,6 +189,17 @@ TEMPLATES = [
         },
     },
 ]
+# Без DEBUG шаблоны компилируются один раз на процесс (cached.Loader),
+# а wsgi.py заранее компилирует шаблоны проекта до fork воркеров.
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+WARM_TEMPLATES = not DEBUG
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -115,7 +211,44 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами, а не открывается на каждый.
+        'CONN_MAX_AGE': 600,
+    }
+}
+
+# Реплики для чтения лент: пути к копиям базы через запятую в
+# YATUBE_DB_REPLICAS. Локально это копии db.sqlite3, которые обновляет
+# manage.py sync_replicas; в тестах реплики зеркалируют основную базу.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get(
+        'YATUBE_DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Модели, которые можно читать с реплик; сессии и пользователи
+# всегда читаются с основной базы.
+REPLICA_APPS = ('posts',)
+# Сколько секунд после записи браузер автора читает с основной базы.
+REPLICA_PIN_SECONDS = 15
+REPLICA_PIN_COOKIE = 'db_primary'
+
+# PRAGMA для каждого нового соединения SQLite (core.db).
+# WAL позволяет читать во время записи, synchronous=NORMAL в WAL не
+# теряет целостность при сбое, busy_timeout ждёт блокировку вместо
+# ошибки "database is locked", mmap_size и cache_size держат горячие
+# страницы в памяти (cache_size < 0 - размер в КиБ).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
 }
 
 
@@ -156,8 +289,19 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-
-if DEBUG:
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Без DEBUG collectstatic добавляет хеш содержимого в имена и кладёт
+# рядом .gz/.br; core.staticfiles.StaticFiles в wsgi.py отдаёт их сам.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage')
+# Кэш в браузере: имена с хешем не меняются, остальные - ненадолго.
+STATIC_HASHED_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_MAX_AGE = 60
+
+# Лог каждого SQL-запроса медленный, поэтому включается только явно:
+# YATUBE_LOG_SQL=1. Число и время запросов видно в заголовке Server-Timing.
+if DEBUG and os.environ.get('YATUBE_LOG_SQL'):
     import logging
     logging.basicConfig()
     LOGGING = {
@@ -14,3 +14,16 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны компилируются до первого запроса (и до fork при preload).
+from django.conf import settings  # noqa: E402
+
+if settings.WARM_TEMPLATES:
+    from core.warmup import warm_on_boot
+
+    warm_on_boot()
+
+# Собранная статика отдаётся до Django (см. core.staticfiles).
+from core.staticfiles import StaticFiles  # noqa: E402
+
+application = StaticFiles(application)